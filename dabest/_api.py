@@ -5,7 +5,10 @@
 
 
 def load(data, idx, x=None, y=None, paired=False, id_col=None,
-        ci=95, resamples=5000, random_seed=12345):
+        ci=95, resamples=5000, random_seed=12345, memory_limit=None,
+        n_jobs=1, legacy_rng=False, bootstrap_dtype=None,
+        store_bootstraps=True, mc_tolerance=None, sampling="ordinary",
+        permutation_stop_after=None, store_permutations=True):
     '''
     Loads data in preparation for estimation statistics.
 
@@ -24,9 +27,12 @@ def load(data, idx, x=None, y=None, paired=False, id_col=None,
     paired : boolean, default False.
     id_col : default None.
         Required if `paired` is True.
-    ci : integer, default 95
+    ci : integer, or sequence of integers, default 95
         The confidence interval width. The default of 95 produces 95%
-        confidence intervals.
+        confidence intervals. If a sequence of widths is given, eg.
+        (80, 90, 95, 99), the intervals at every width are computed from
+        the same bootstraps, and the results have one row per comparison
+        and width. Plots show the intervals at the first width.
     resamples : integer, default 5000.
         The number of resamples taken to generate the bootstraps which are used
         to generate the confidence intervals.
@@ -34,6 +40,63 @@ def load(data, idx, x=None, y=None, paired=False, id_col=None,
         This integer is used to seed the random number generator during
         bootstrap resampling, ensuring that the confidence intervals
         reported are replicable.
+    memory_limit : int, default None
+        The approximate maximum number of bytes used to hold bootstrap
+        resamples at any one time. Resamples are evaluated in blocks that
+        fit within this budget; the resamples drawn do not depend on it. If
+        None, up to 256 MB is used. With `n_jobs` greater than 1, the budget
+        is shared between the worker processes.
+    n_jobs : int, default 1
+        The number of worker processes the bootstrap resamples of each
+        comparison are split across; -1 uses all available CPUs. The
+        resamples are drawn from child streams spawned from `random_seed`,
+        so the results are the same for any number of workers.
+    legacy_rng : boolean, default False
+        If True, resamples and permutations are drawn one at a time with
+        `numpy.random.RandomState`, reproducing the results of dabest
+        v0.3.1 and earlier exactly. This is slower, and cannot be combined
+        with `n_jobs` greater than 1.
+    bootstrap_dtype : dtype, default None
+        The floating-point dtype the bootstraps of each effect size are
+        stored in, both in the effect size objects and in the `results`
+        table. `numpy.float32` halves the memory (and pickle size) they
+        take up. The effect sizes and confidence intervals are computed
+        in float64 regardless. If None, the bootstraps are kept as float64.
+    store_bootstraps : boolean, default True
+        If False, the bootstraps are neither sorted nor stored, and the
+        confidence interval limits are selected from them directly. This
+        saves time and memory when only the `results` are needed, but the
+        effect sizes cannot then be plotted.
+    mc_tolerance : float, default None
+        If given, the number of resamples for each comparison is chosen
+        adaptively, with `resamples` as the maximum: resamples are drawn in
+        batches of 1000 until the Monte Carlo standard errors of the BCa
+        interval limits are at most `mc_tolerance`, in the units of the
+        effect size. The `resamples` column of the `results` reports the
+        number drawn for each comparison. This cannot be combined with
+        `legacy_rng`.
+    sampling : string, default "ordinary"
+        How the bootstrap resamples are drawn. "ordinary" resamples are
+        drawn independently. With "balanced" resampling, every observation
+        appears exactly `resamples` times over all of the resamples; with
+        "antithetic" resampling, the resamples are drawn in pairs, the
+        second being the mirror image of the first in terms of the ranks of
+        the observations. Both reduce the Monte Carlo variance of the
+        bootstraps (chiefly of their mean, and so of the bias correction),
+        and cannot be combined with `legacy_rng`. Balanced resamples are
+        drawn 250 at a time, and the indexes of these must fit within half
+        of `memory_limit`.
+    permutation_stop_after : int, default None
+        If given, the permutation tests are sequential (Besag & Clifford,
+        1991): each stops as soon as this many permutations are more
+        extreme than the observed effect size, eg. 10. Clearly
+        non-significant comparisons then need only a few permutations. The
+        `permutation_count` column of the `results` reports the number
+        drawn for each comparison.
+    store_permutations : boolean, default True
+        If False, the effect sizes of the permutations of each permutation
+        test are discarded once its p-value has been computed, which saves
+        memory when many comparisons are held at once.
 
     Returns
     -------
@@ -62,4 +125,7 @@ def load(data, idx, x=None, y=None, paired=False, id_col=None,
     '''
     from ._classes import Dabest
 
-    return Dabest(data, idx, x, y, paired, id_col, ci, resamples, random_seed)
+    return Dabest(data, idx, x, y, paired, id_col, ci, resamples, random_seed,
+                  memory_limit, n_jobs, legacy_rng, bootstrap_dtype,
+                  store_bootstraps, mc_tolerance, sampling,
+                  permutation_stop_after, store_permutations)
@@ -10,7 +10,10 @@ class Dabest(object):
     """
 
     def __init__(self, data, idx, x, y, paired, id_col, ci, resamples,
-                random_seed):
+                random_seed, memory_limit=None, n_jobs=1, legacy_rng=False,
+                bootstrap_dtype=None, store_bootstraps=True,
+                mc_tolerance=None, sampling="ordinary",
+                permutation_stop_after=None, store_permutations=True):
 
         """
         Parses and stores pandas DataFrames in preparation for estimation
@@ -30,6 +33,20 @@ class Dabest(object):
         self.__is_paired   = paired
         self.__resamples   = resamples
         self.__random_seed = random_seed
+        self.__memory_limit = memory_limit
+        self.__n_jobs      = n_jobs
+        self.__legacy_rng  = legacy_rng
+        self.__bootstrap_dtype = bootstrap_dtype
+        self.__store_bootstraps = store_bootstraps
+        self.__mc_tolerance = mc_tolerance
+        self.__sampling    = sampling
+        self.__permutation_stop_after = permutation_stop_after
+        self.__store_permutations = store_permutations
+
+        if bootstrap_dtype is not None and \
+           np.dtype(bootstrap_dtype).kind != "f":
+            err = "`bootstrap_dtype` must be a floating-point dtype."
+            raise ValueError(err)
 
         # Make a copy of the data, so we don't make alterations to it.
         data_in = data.copy()
@@ -181,9 +198,20 @@ class Dabest(object):
                 err = "{} is not a column in `data`. ".format(id_col)
                 raise IndexError(err)
 
+        self.__shared_resamples = {}
+
         EffectSizeDataFrame_kwargs = dict(ci=ci, is_paired=paired,
                                            random_seed=random_seed,
-                                           resamples=resamples)
+                                           resamples=resamples,
+                                           memory_limit=memory_limit,
+                                           n_jobs=n_jobs,
+                                           legacy_rng=legacy_rng,
+                                           bootstrap_dtype=bootstrap_dtype,
+                                           store_bootstraps=store_bootstraps,
+                                           mc_tolerance=mc_tolerance,
+                                           sampling=sampling,
+                                           permutation_stop_after=permutation_stop_after,
+                                           store_permutations=store_permutations)
 
         self.__mean_diff    = EffectSizeDataFrame(self, "mean_diff",
                                                 **EffectSizeDataFrame_kwargs)
@@ -219,7 +247,11 @@ class Dabest(object):
         greeting_header = print_greeting()
 
         s1 = "{}ffect size(s) ".format(es)
-        s2 = "with {}% confidence intervals will be computed for:".format(self.__ci)
+        if np.ndim(self.__ci) > 0:
+            ci_width = ", ".join([str(c) for c in self.__ci])
+        else:
+            ci_width = self.__ci
+        s2 = "with {}% confidence intervals will be computed for:".format(ci_width)
         desc_line = s1 + s2
 
         out = [greeting_header + "\n\n" + desc_line]
@@ -242,6 +274,110 @@ class Dabest(object):
         return "\n".join(out)
 
 
+    def all_effect_sizes(self, effect_sizes=None):
+        """
+        Computes several effect sizes for every comparison from one shared
+        set of bootstrap resamples, which is faster than computing each
+        effect size in turn. The resamples are the same as those drawn for
+        each effect size on its own, so the results are identical.
+
+        Parameters
+        ----------
+        effect_sizes : list of strings, default None
+            Any of 'mean_diff', 'median_diff', 'cohens_d', 'hedges_g' and
+            'cliffs_delta'. If None, every effect size that is defined for
+            the data is computed.
+
+        Returns
+        -------
+        A dict mapping each effect size to its `EffectSizeDataFrame`, eg.
+        `my_data.mean_diff`, with the results already computed.
+
+        Example
+        -------
+        >>> reports = my_data.all_effect_sizes(["mean_diff", "hedges_g",
+        ...                                     "median_diff"])
+        >>> reports["hedges_g"].results
+        """
+        from numpy import array, isnan
+        from ._stats_tools import confint_2group_diff as ci2g
+
+        effect_size_dfs = {"mean_diff"    : self.__mean_diff,
+                           "median_diff"  : self.__median_diff,
+                           "cohens_d"     : self.__cohens_d,
+                           "hedges_g"     : self.__hedges_g,
+                           "cliffs_delta" : self.__cliffs_delta}
+
+        if effect_sizes is None:
+            effect_sizes = [es for es in effect_size_dfs.keys()
+                            if not (self.__is_paired and es == "cliffs_delta")]
+        else:
+            effect_sizes = list(effect_sizes)
+
+        for es in effect_sizes:
+            if es not in effect_size_dfs.keys():
+                err1 = "The effect size '{}'".format(es)
+                err2 = "is not one of {}".format(list(effect_size_dfs.keys()))
+                raise ValueError(" ".join([err1, err2]))
+            if es == "cliffs_delta" and self.__is_paired is True:
+                err1 = "`paired` is True; therefore Cliff's delta is not defined."
+                raise ValueError(err1)
+
+        dat  = self.__plot_data
+        xvar = self.__xvar
+        yvar = self.__yvar
+
+        # Effect sizes whose results have already been computed keep them,
+        # so no resamples are drawn for those.
+        pending = [es for es in effect_sizes
+                   if not effect_size_dfs[es]._has_results]
+
+        if not pending:
+            return {es: effect_size_dfs[es] for es in effect_sizes}
+
+        shared_resamples = {es: {} for es in pending}
+
+        for current_tuple in self.__idx:
+            cname = current_tuple[0]
+            control = array(dat[dat[xvar] == cname][yvar])
+            control = control[~isnan(control)]
+
+            for tname in current_tuple[1:]:
+                test = array(dat[dat[xvar] == tname][yvar])
+                test = test[~isnan(test)]
+
+                # With an adaptive number of resamples, each effect size
+                # draws as many as it needs, so only the jackknives are
+                # shared.
+                if self.__mc_tolerance is None:
+                    bootstraps = ci2g.compute_bootstrapped_diff(
+                                    control, test, self.__is_paired,
+                                    pending, self.__resamples,
+                                    self.__random_seed, self.__memory_limit,
+                                    self.__n_jobs, self.__legacy_rng,
+                                    self.__sampling)
+                else:
+                    bootstraps = {es: None for es in pending}
+                jackknives = ci2g.compute_meandiff_jackknife(
+                                    control, test, self.__is_paired,
+                                    pending)
+
+                for es in pending:
+                    shared_resamples[es][(cname, tname)] = dict(
+                                            bootstraps=bootstraps[es],
+                                            jackknives=jackknives[es])
+
+        # The shared resamples are only held while the results are computed.
+        self.__shared_resamples = shared_resamples
+        try:
+            for es in pending:
+                effect_size_dfs[es].results
+        finally:
+            self.__shared_resamples = {}
+
+        return {es: effect_size_dfs[es] for es in effect_sizes}
+
+
     # def __variable_name(self):
     #     return [k for k,v in locals().items() if v is self]
     #
@@ -499,6 +635,74 @@ class Dabest(object):
         """
         return self.__random_seed
 
+    @property
+    def memory_limit(self):
+        """
+        The approximate maximum number of bytes used to hold bootstrap
+        resamples at any one time.
+        """
+        return self.__memory_limit
+
+    @property
+    def n_jobs(self):
+        """
+        The number of worker processes used to compute each bootstrap.
+        """
+        return self.__n_jobs
+
+    @property
+    def legacy_rng(self):
+        """
+        Whether resamples are drawn with the legacy `numpy.random.RandomState`
+        generator.
+        """
+        return self.__legacy_rng
+
+    @property
+    def bootstrap_dtype(self):
+        """
+        The dtype the bootstraps are stored in. If None, they are float64.
+        """
+        return self.__bootstrap_dtype
+
+    @property
+    def store_bootstraps(self):
+        """
+        Whether the sorted bootstraps of each effect size are stored.
+        """
+        return self.__store_bootstraps
+
+    @property
+    def mc_tolerance(self):
+        """
+        The tolerance for the Monte Carlo error of the BCa interval limits,
+        if the number of resamples is chosen adaptively.
+        """
+        return self.__mc_tolerance
+
+    @property
+    def sampling(self):
+        """
+        How the bootstrap resamples are drawn: "ordinary", "balanced" or
+        "antithetic".
+        """
+        return self.__sampling
+
+    @property
+    def permutation_stop_after(self):
+        """
+        The number of permutations more extreme than the observed effect
+        size after which the permutation tests stop, if they are sequential.
+        """
+        return self.__permutation_stop_after
+
+    @property
+    def store_permutations(self):
+        """
+        Whether the permuted effect sizes of each permutation test are kept.
+        """
+        return self.__store_permutations
+
 
     @property
     def x(self):
@@ -535,6 +739,16 @@ class Dabest(object):
         """
         return self.__plot_data
 
+    @property
+    def _shared_resamples(self):
+        """
+        Returns the bootstraps and jackknives shared amongst effect sizes
+        while `all_effect_sizes()` is running.
+        """
+        return self.__shared_resamples
+
+
+
     @property
     def _all_plot_groups(self):
         """
@@ -558,7 +772,19 @@ class TwoGroupsEffectSize(object):
                  is_paired=False, ci=95,
                  resamples=5000, 
                  permutation_count=5000, 
-                 random_seed=12345):
+                 random_seed=12345,
+                 memory_limit=None,
+                 n_jobs=1,
+                 legacy_rng=False,
+                 bootstrap_dtype=None,
+                 store_bootstraps=True,
+                 bootstraps=None,
+                 jackknives=None,
+                 ci_method="bca",
+                 mc_tolerance=None,
+                 sampling="ordinary",
+                 permutation_stop_after=None,
+                 store_permutations=True):
 
         """
         Compute the effect size between two groups.
@@ -577,14 +803,83 @@ class TwoGroupsEffectSize(object):
             of the confidence interval limits.
         permutation_count : int, default 5000
             The number of permutations (reshuffles) to perform for the 
-            computation of the permutation p-value
-        ci : float, default 95
+            computation of the permutation p-value. If the observations can
+            be relabeled in no more ways than this, every relabeling is
+            evaluated instead, for an exact p-value.
+        ci : float, or sequence of floats, default 95
             The confidence interval width. The default of 95 produces 95%
-            confidence intervals.
+            confidence intervals. If a sequence of widths is given, eg.
+            (80, 90, 95, 99), the intervals at every width are taken from
+            the same bootstraps, and `ci`, `alpha`, and each of the
+            interval limits and indexes below are tuples with one entry
+            per width.
         random_seed : int, default 12345
             `random_seed` is used to seed the random number generator during
             bootstrap resampling. This ensures that the confidence intervals
             reported are replicable.
+        memory_limit : int, default None
+            The approximate maximum number of bytes used to hold bootstrap
+            resamples at any one time, shared between the worker processes
+            if `n_jobs` is greater than 1. If None, up to 256 MB is used.
+        n_jobs : int, default 1
+            The number of worker processes the bootstrap resamples are split
+            across; -1 uses all available CPUs. The resamples are drawn from
+            child streams spawned from `random_seed`, so the bootstraps are
+            the same for any number of workers.
+        legacy_rng : boolean, default False
+            If True, resamples and permutations are drawn one at a time with
+            `numpy.random.RandomState`, reproducing the results of dabest
+            v0.3.1 and earlier exactly.
+        bootstrap_dtype : dtype, default None
+            The floating-point dtype the bootstraps are stored in, eg.
+            `numpy.float32` to halve the memory they take up. The effect
+            size and the confidence interval limits are computed from the
+            float64 bootstraps before they are converted. If None, the
+            bootstraps are kept as float64.
+        store_bootstraps : boolean, default True
+            If False, the bootstraps are not stored (`bootstraps` is None),
+            and are not sorted either; only the values at the interval
+            limits are selected from them. This saves time and memory when
+            only the confidence intervals are needed.
+        bootstraps : array-like, default None
+        jackknives : array-like, default None
+            Precomputed bootstraps and jackknife of the effect size, eg.
+            from `compute_bootstrapped_diff` and `compute_meandiff_jackknife`
+            called with several effect sizes at once. They must have been
+            computed from `control` and `test` (with NaNs dropped) using
+            the same `resamples` and `random_seed`. If None, they are
+            computed here.
+        ci_method : string, default "bca"
+            If "studentized", the bootstrap-t confidence interval is also
+            computed (as `studentized_low` and `studentized_high`), and is
+            the interval reported. This needs the standard error of every
+            bootstrap: it is computed from its closed form for the mean
+            difference and the unpaired Cohen's d and Hedges' g, and from 50
+            inner resamples of each bootstrap otherwise. `bootstraps` are
+            then ignored, and `legacy_rng` must be False.
+        mc_tolerance : float, default None
+            If given, the number of resamples is chosen adaptively: they are
+            drawn in batches of 1000 until the Monte Carlo standard errors of
+            the BCa interval limits are at most `mc_tolerance` (in the units
+            of the effect size), with `resamples` as the maximum. `resamples`
+            then returns the number actually drawn. This cannot be combined
+            with `legacy_rng`, or with the "studentized" `ci_method`.
+        sampling : string, default "ordinary"
+            How the bootstrap resamples are drawn: "ordinary" (independently),
+            "balanced" (every observation appears exactly `resamples` times
+            in all), or "antithetic" (in pairs of mirror images, by rank).
+            See `compute_bootstrapped_diff`. Balanced and antithetic
+            resamples reduce the Monte Carlo variance of the bootstraps; they
+            cannot be drawn with `legacy_rng`, or for studentized intervals.
+        permutation_stop_after : int, default None
+            If given, the permutation test is sequential: it stops as soon as
+            this many permutations are more extreme than the observed effect
+            size, which takes few permutations for clearly non-significant
+            differences. `permutation_count` then returns the number of
+            permutations drawn. See `PermutationTest`.
+        store_permutations : boolean, default True
+            If False, the effect sizes of the permutations are not kept
+            (`permutations` is None) once the p-value has been computed.
 
 
         Returns
@@ -609,6 +904,7 @@ class TwoGroupsEffectSize(object):
             
         resamples : int
             The number of resamples performed during the bootstrap procedure.
+            If `mc_tolerance` is given, this is the number actually drawn.
 
         bootstraps : nmupy ndarray
             The generated bootstraps of the effect size.
@@ -620,10 +916,23 @@ class TwoGroupsEffectSize(object):
         bca_low, bca_high : float
             The bias-corrected and accelerated confidence interval lower limit
             and upper limits, respectively.
+
+        bca_low_mc_se, bca_high_mc_se : float
+            The Monte Carlo standard errors of `bca_low` and `bca_high`, ie.
+            how much they would vary with the random seed. They are
+            estimated from the spacing of the sorted bootstraps around each
+            limit, so no further resamples are needed.
+
+        pvalue_permutation_mc_se : float
+            The Monte Carlo standard error of `pvalue_permutation`.
             
         pct_low, pct_high : float
             The percentile confidence interval lower limit and upper limits, 
             respectively.
+
+        studentized_low, studentized_high : float
+            The bootstrap-t confidence interval lower limit and upper limits,
+            respectively, if `ci_method` is "studentized"; NaN otherwise.
             
             
         Examples
@@ -706,6 +1015,32 @@ class TwoGroupsEffectSize(object):
             err1 = "`paired` is True; therefore Cliff's delta is not defined."
             raise ValueError(err1)
 
+        if ci_method not in ("bca", "studentized"):
+            err = "`ci_method` must be either 'bca' or 'studentized'."
+            raise ValueError(err)
+
+        if ci_method == "studentized" and legacy_rng:
+            err1 = "Studentized intervals cannot be computed with"
+            err2 = "`legacy_rng`, as the resamples are drawn differently."
+            raise ValueError(" ".join([err1, err2]))
+
+        if mc_tolerance is not None and (legacy_rng or
+                                         ci_method == "studentized"):
+            err1 = "An adaptive number of resamples (`mc_tolerance`)"
+            err2 = "cannot be used with `legacy_rng`, or with studentized"
+            err3 = "intervals."
+            raise ValueError(" ".join([err1, err2, err3]))
+
+        ci2g._check_sampling(sampling, legacy_rng)
+        if sampling != "ordinary" and ci_method == "studentized":
+            err = "Studentized intervals can only use ordinary resamples."
+            raise ValueError(err)
+
+        if bootstrap_dtype is not None and \
+           np.dtype(bootstrap_dtype).kind != "f":
+            err = "`bootstrap_dtype` must be a floating-point dtype."
+            raise ValueError(err)
+
         # Convert to numpy arrays for speed.
         # NaNs are automatically dropped.
         control = array(control)
@@ -719,27 +1054,64 @@ class TwoGroupsEffectSize(object):
         self.__is_paired         = is_paired
         self.__resamples         = resamples
         self.__permutation_count = permutation_count
+        self.__permutation_stop_after = permutation_stop_after
         self.__random_seed       = random_seed
-        self.__ci                = ci
-        self.__alpha             = ci2g._compute_alpha_from_ci(ci)
+        self.__ci_method         = ci_method
+        # `ci` may be a sequence of confidence levels, in which case the
+        # intervals at every level are taken from the same bootstraps.
+        multiple_ci = np.ndim(ci) > 0
+        if multiple_ci:
+            ci_levels = [c for c in ci]
+            self.__ci    = tuple(ci_levels)
+            self.__alpha = tuple(ci2g._compute_alpha_from_ci(ci_levels))
+        else:
+            ci_levels = [ci]
+            self.__ci    = ci
+            self.__alpha = ci2g._compute_alpha_from_ci(ci)
 
 
         self.__difference = es.two_group_difference(
                                 control, test, is_paired, effect_size)
 
-        self.__jackknives = ci2g.compute_meandiff_jackknife(
+        if jackknives is None:
+            jackknives = ci2g.compute_meandiff_jackknife(
                                 control, test, is_paired, effect_size)
+        self.__jackknives = jackknives
 
         self.__acceleration_value = ci2g._calc_accel(self.__jackknives)
 
-        bootstraps = ci2g.compute_bootstrapped_diff(
-                            control, test, is_paired, effect_size,
-                            resamples, random_seed)
-        self.__bootstraps = npsort(bootstraps)
+        if ci_method == "studentized":
+            bootstraps, bootstrap_ses, se = ci2g.compute_studentized_bootstraps(
+                                control, test, is_paired, effect_size,
+                                resamples, random_seed, memory_limit, n_jobs)
+            studentized_low, studentized_high = \
+                ci2g.compute_studentized_interval(bootstraps, bootstrap_ses,
+                                                  self.__difference, se,
+                                                  ci_levels)
+            del bootstrap_ses
+        else:
+            studentized_low  = [np.nan for c in ci_levels]
+            studentized_high = [np.nan for c in ci_levels]
+
+        if bootstraps is None and mc_tolerance is not None:
+            bootstraps = ci2g.compute_adaptive_bootstrapped_diff(
+                                control, test, is_paired, effect_size,
+                                self.__difference, self.__acceleration_value,
+                                mc_tolerance, ci_levels, resamples,
+                                random_seed, memory_limit, n_jobs, sampling)
+            resamples = len(bootstraps)
+            self.__resamples = resamples
+
+        elif bootstraps is None:
+            bootstraps = ci2g.compute_bootstrapped_diff(
+                                control, test, is_paired, effect_size,
+                                resamples, random_seed, memory_limit, n_jobs,
+                                legacy_rng, sampling)
+        bootstraps = np.asarray(bootstraps)
         
         # Added in v0.2.6.
         # Raises a UserWarning if there are any infiinities in the bootstraps.
-        num_infinities = len(self.__bootstraps[isinf(self.__bootstraps)])
+        num_infinities = np.count_nonzero(isinf(bootstraps))
         
         if num_infinities > 0:
             warn_msg = "There are {} bootstrap(s) that are not defined. "\
@@ -752,64 +1124,121 @@ class TwoGroupsEffectSize(object):
                           category=UserWarning)
 
         self.__bias_correction = ci2g.compute_meandiff_bias_correction(
-                                    self.__bootstraps, self.__difference)
+                                    bootstraps, self.__difference)
 
         # Compute BCa intervals.
         bca_idx_low, bca_idx_high = ci2g.compute_interval_limits(
             self.__bias_correction, self.__acceleration_value,
-            self.__resamples, ci)
-
-        self.__bca_interval_idx = (bca_idx_low, bca_idx_high)
-
-        if ~isnan(bca_idx_low) and ~isnan(bca_idx_high):
-            self.__bca_low  = self.__bootstraps[bca_idx_low]
-            self.__bca_high = self.__bootstraps[bca_idx_high]
-
-            err1 = "The $lim_type limit of the interval"
-            err2 = "was in the $loc 10 values."
-            err3 = "The result should be considered unstable."
-            err_temp = Template(" ".join([err1, err2, err3]))
-
-            if bca_idx_low <= 10:
-                warnings.warn(err_temp.substitute(lim_type="lower",
-                                                  loc="bottom"),
-                              stacklevel=1)
-
-            if bca_idx_high >= resamples-9:
-                warnings.warn(err_temp.substitute(lim_type="upper",
-                                                  loc="top"),
-                              stacklevel=1)
-
+            self.__resamples, ci_levels)
+
+        alphas = [ci2g._compute_alpha_from_ci(c) for c in ci_levels]
+        pct_idx_low  = [int((a/2)     * resamples) for a in alphas]
+        pct_idx_high = [int((1-(a/2)) * resamples) for a in alphas]
+
+        # Only the values at the interval limits are needed, so unless the
+        # sorted bootstraps are to be kept, those are selected rather than
+        # sorting all of the bootstraps.
+        if store_bootstraps:
+            bootstraps = npsort(bootstraps)
+            self.__bootstraps = bootstraps
         else:
-            err1 = "The $lim_type limit of the BCa interval cannot be computed."
-            err2 = "It is set to the effect size itself."
-            err3 = "All bootstrap values were likely all the same."
-            err_temp = Template(" ".join([err1, err2, err3]))
+            bca_idx = bca_idx_low + bca_idx_high
+            bootstraps = ci2g.partition_at_interval_limits(bootstraps,
+                                bca_idx + pct_idx_low + pct_idx_high +
+                                ci2g.interval_limit_mc_se_indexes(bca_idx,
+                                                                  resamples))
+            self.__bootstraps = None
+
+        err1 = "The $lim_type limit of the interval"
+        err2 = "was in the $loc 10 values."
+        err3 = "The result should be considered unstable."
+        unstable_temp = Template(" ".join([err1, err2, err3]))
+
+        err1 = "The $lim_type limit of the BCa interval cannot be computed."
+        err2 = "It is set to the effect size itself."
+        err3 = "All bootstrap values were likely all the same."
+        undefined_temp = Template(" ".join([err1, err2, err3]))
+
+        bca_low, bca_high = [], []
+
+        for idx_low, idx_high in zip(bca_idx_low, bca_idx_high):
+            if ~isnan(idx_low) and ~isnan(idx_high):
+                bca_low.append(bootstraps[idx_low])
+                bca_high.append(bootstraps[idx_high])
+
+                if idx_low <= 10:
+                    warnings.warn(unstable_temp.substitute(lim_type="lower",
+                                                           loc="bottom"),
+                                  stacklevel=1)
+
+                if idx_high >= resamples-9:
+                    warnings.warn(unstable_temp.substitute(lim_type="upper",
+                                                           loc="top"),
+                                  stacklevel=1)
 
-            if isnan(bca_idx_low):
-                self.__bca_low  = self.__difference
-                warnings.warn(err_temp.substitute(lim_type="lower"),
-                              stacklevel=0)
+            else:
+                if isnan(idx_low):
+                    bca_low.append(self.__difference)
+                    warnings.warn(undefined_temp.substitute(lim_type="lower"),
+                                  stacklevel=0)
+                else:
+                    bca_low.append(bootstraps[idx_low])
 
-            if isnan(bca_idx_high):
-                self.__bca_high  = self.__difference
-                warnings.warn(err_temp.substitute(lim_type="upper"),
-                              stacklevel=0)
+                if isnan(idx_high):
+                    bca_high.append(self.__difference)
+                    warnings.warn(undefined_temp.substitute(lim_type="upper"),
+                                  stacklevel=0)
+                else:
+                    bca_high.append(bootstraps[idx_high])
 
-        # Compute percentile intervals.
-        pct_idx_low  = int((self.__alpha/2)     * resamples)
-        pct_idx_high = int((1-(self.__alpha/2)) * resamples)
+        # The Monte Carlo errors of the BCa limits.
+        bca_low_mc_se  = [ci2g.compute_interval_limit_mc_se(bootstraps, i)
+                          for i in bca_idx_low]
+        bca_high_mc_se = [ci2g.compute_interval_limit_mc_se(bootstraps, i)
+                          for i in bca_idx_high]
 
-        self.__pct_interval_idx = (pct_idx_low, pct_idx_high)
-        self.__pct_low  = self.__bootstraps[pct_idx_low]
-        self.__pct_high = self.__bootstraps[pct_idx_high]
+        # Compute percentile intervals.
+        pct_low  = [bootstraps[i] for i in pct_idx_low]
+        pct_high = [bootstraps[i] for i in pct_idx_high]
+
+        if multiple_ci:
+            self.__bca_interval_idx = tuple(zip(bca_idx_low, bca_idx_high))
+            self.__bca_low          = tuple(bca_low)
+            self.__bca_high         = tuple(bca_high)
+            self.__bca_low_mc_se    = tuple(bca_low_mc_se)
+            self.__bca_high_mc_se   = tuple(bca_high_mc_se)
+            self.__pct_interval_idx = tuple(zip(pct_idx_low, pct_idx_high))
+            self.__pct_low          = tuple(pct_low)
+            self.__pct_high         = tuple(pct_high)
+            self.__studentized_low  = tuple(studentized_low)
+            self.__studentized_high = tuple(studentized_high)
+        else:
+            self.__bca_interval_idx = (bca_idx_low[0], bca_idx_high[0])
+            self.__bca_low          = bca_low[0]
+            self.__bca_high         = bca_high[0]
+            self.__bca_low_mc_se    = bca_low_mc_se[0]
+            self.__bca_high_mc_se   = bca_high_mc_se[0]
+            self.__pct_interval_idx = (pct_idx_low[0], pct_idx_high[0])
+            self.__pct_low          = pct_low[0]
+            self.__pct_high         = pct_high[0]
+            self.__studentized_low  = studentized_low[0]
+            self.__studentized_high = studentized_high[0]
+
+        # Store the bootstraps compactly, once the interval limits have
+        # been taken from them at full precision.
+        if bootstrap_dtype is not None and store_bootstraps:
+            self.__bootstraps = self.__bootstraps.astype(bootstrap_dtype,
+                                                         copy=False)
 
         # Perform statistical tests.
                 
         self.__PermutationTest_result = PermutationTest(control, test, 
                                                         effect_size, 
                                                         is_paired,
-                                                        permutation_count)
+                                                        permutation_count,
+                                                        legacy_rng=legacy_rng,
+                                                        stop_after=permutation_stop_after,
+                                                        store_permutations=store_permutations)
         
         if is_paired is True:
             # Wilcoxon, a non-parametric version of the paired T-test.
@@ -911,6 +1340,7 @@ class TwoGroupsEffectSize(object):
 
 
     def __repr__(self, show_resample_count=True, define_pval=True, sigfig=3):
+        import numpy as np
         
         # # Deprecated in v0.3.0; permutation p-values will be reported by default.
         # UNPAIRED_ES_TO_TEST = {"mean_diff"    : "Mann-Whitney",
@@ -932,17 +1362,29 @@ class TwoGroupsEffectSize(object):
         out1 = "The {is_paired} {es} ".format(**first_line)
         
         base_string_fmt = "{:." + str(sigfig) + "}"
-        if "." in str(self.__ci):
-            ci_width = base_string_fmt.format(self.__ci)
+
+        if self.__ci_method == "studentized":
+            ci_low, ci_high = self.__studentized_low, self.__studentized_high
         else:
-            ci_width = str(self.__ci)
-        
-        ci_out = {"es"       : base_string_fmt.format(self.__difference),
-                  "ci"       : ci_width,
-                  "bca_low"  : base_string_fmt.format(self.__bca_low),
-                  "bca_high" : base_string_fmt.format(self.__bca_high)}
-        
-        out2 = "is {es} [{ci}%CI {bca_low}, {bca_high}].".format(**ci_out)
+            ci_low, ci_high = self.__bca_low, self.__bca_high
+
+        if np.ndim(self.__ci) > 0:
+            intervals = zip(self.__ci, ci_low, ci_high)
+        else:
+            intervals = [(self.__ci, ci_low, ci_high)]
+
+        ci_strings = []
+        for ci, bca_low, bca_high in intervals:
+            if "." in str(ci):
+                ci_width = base_string_fmt.format(ci)
+            else:
+                ci_width = str(ci)
+            ci_strings.append("{}%CI {}, {}".format(ci_width,
+                                            base_string_fmt.format(bca_low),
+                                            base_string_fmt.format(bca_high)))
+
+        out2 = "is {} [{}].".format(base_string_fmt.format(self.__difference),
+                                    "; ".join(ci_strings))
         out = out1 + out2
         
         # # Deprecated in v0.3.0; permutation p-values will be reported by default.
@@ -969,13 +1411,31 @@ class TwoGroupsEffectSize(object):
         pvalue = "The p-value of the two-sided permutation t-test is {}. ".format(pval_rounded)
                                                                 
         bs1 = "{} bootstrap samples were taken; ".format(self.__resamples)
-        bs2 = "the confidence interval is bias-corrected and accelerated."
+        if self.__ci_method == "studentized":
+            bs2 = "the confidence interval is studentized (bootstrap-t)."
+        else:
+            bs2 = "the confidence interval is bias-corrected and accelerated."
         bs = bs1 + bs2
 
         pval_def1 = "The p-value(s) reported are the likelihood(s) of observing the " + \
                   "effect size(s),\nif the null hypothesis of zero difference is true."
-        pval_def2 = "\nFor each p-value, 5000 reshuffles of the " + \
-                    "control and test labels were performed."
+        perm_count = self.permutation_count
+        if self.permutation_exact:
+            pval_def2 = "\nFor each p-value, all {} distinct reshuffles of " + \
+                        "the control and test labels were performed, so " + \
+                        "the p-value is exact."
+            pval_def2 = pval_def2.format(perm_count)
+        elif self.permutation_stopped_early:
+            pval_def2 = "\nFor each p-value, the control and test labels " + \
+                        "were reshuffled until {} reshuffles were more " + \
+                        "extreme than the observed effect size, which " + \
+                        "took {} reshuffles."
+            pval_def2 = pval_def2.format(self.__permutation_stop_after,
+                                         perm_count)
+        else:
+            pval_def2 = "\nFor each p-value, {} reshuffles of the " + \
+                        "control and test labels were performed."
+            pval_def2 = pval_def2.format(perm_count)
         pval_def = pval_def1 + pval_def2
 
         if show_resample_count and define_pval:
@@ -1096,6 +1556,46 @@ class TwoGroupsEffectSize(object):
         """
         return self.__pct_high
 
+    @property
+    def bca_low_mc_se(self):
+        """
+        The Monte Carlo standard error of the bias-corrected and accelerated
+        confidence interval lower limit.
+        """
+        return self.__bca_low_mc_se
+
+    @property
+    def bca_high_mc_se(self):
+        """
+        The Monte Carlo standard error of the bias-corrected and accelerated
+        confidence interval upper limit.
+        """
+        return self.__bca_high_mc_se
+
+    @property
+    def ci_method(self):
+        """
+        The method of the confidence interval reported, either "bca" or
+        "studentized".
+        """
+        return self.__ci_method
+
+    @property
+    def studentized_low(self):
+        """
+        The bootstrap-t confidence interval lower limit, if `ci_method` is
+        "studentized".
+        """
+        return self.__studentized_low
+
+    @property
+    def studentized_high(self):
+        """
+        The bootstrap-t confidence interval upper limit, if `ci_method` is
+        "studentized".
+        """
+        return self.__studentized_high
+
 
 
     @property
@@ -1231,10 +1731,41 @@ class TwoGroupsEffectSize(object):
     
     # 
     # 
+    @property
+    def pvalue_permutation_mc_se(self):
+        """
+        The Monte Carlo standard error of the permutation p-value.
+        """
+        return self.__PermutationTest_result.pvalue_mc_se
+
     @property
     def permutation_count(self):
         return self.__PermutationTest_result.permutation_count
 
+    @property
+    def permutation_exact(self):
+        """
+        Whether every distinct relabeling was evaluated in the permutation
+        test, in which case its p-value is exact.
+        """
+        return self.__PermutationTest_result.exact
+
+    @property
+    def permutation_stopped_early(self):
+        """
+        Whether the sequential permutation test stopped before all of the
+        permutations requested were drawn.
+        """
+        return self.__PermutationTest_result.stopped_early
+
+    @property
+    def permutations(self):
+        """
+        The effect sizes of the permutations of the permutation test, or
+        None if they were not stored.
+        """
+        return self.__PermutationTest_result.permutations
+
 
 
     # Introduced in v0.2.8, removed in v0.3.0 for performance issues.
@@ -1316,7 +1847,16 @@ class EffectSizeDataFrame(object):
                  is_paired, ci=95,
                  resamples=5000, 
                  permutation_count=5000,
-                 random_seed=12345):
+                 random_seed=12345,
+                 memory_limit=None,
+                 n_jobs=1,
+                 legacy_rng=False,
+                 bootstrap_dtype=None,
+                 store_bootstraps=True,
+                 mc_tolerance=None,
+                 sampling="ordinary",
+                 permutation_stop_after=None,
+                 store_permutations=True):
         """
         Parses the data from a Dabest object, enabling plotting and printing
         capability for the effect size of interest.
@@ -1329,9 +1869,19 @@ class EffectSizeDataFrame(object):
         self.__resamples         = resamples
         self.__permutation_count = permutation_count
         self.__random_seed       = random_seed
+        self.__memory_limit      = memory_limit
+        self.__n_jobs            = n_jobs
+        self.__legacy_rng        = legacy_rng
+        self.__bootstrap_dtype   = bootstrap_dtype
+        self.__store_bootstraps  = store_bootstraps
+        self.__mc_tolerance      = mc_tolerance
+        self.__sampling          = sampling
+        self.__permutation_stop_after = permutation_stop_after
+        self.__store_permutations = store_permutations
 
 
     def __pre_calc(self):
+        import numpy as np
         import pandas as pd
         from .misc_tools import print_greeting, get_varname
 
@@ -1340,8 +1890,12 @@ class EffectSizeDataFrame(object):
         xvar = self.__dabest_obj._xvar
         yvar = self.__dabest_obj._yvar
 
+        shared_resamples = self.__dabest_obj._shared_resamples.get(
+                                self.__effect_size, {})
+
         out = []
         reprs = []
+        permutation_kinds = set()
 
         for j, current_tuple in enumerate(idx):
 
@@ -1351,21 +1905,50 @@ class EffectSizeDataFrame(object):
             for ix, tname in enumerate(current_tuple[1:]):
                 test = dat[dat[xvar] == tname][yvar].copy()
 
+                # Use resamples shared amongst effect sizes, if they have
+                # been drawn by `Dabest.all_effect_sizes()`.
+                shared = shared_resamples.get((cname, tname), {})
+
                 result = TwoGroupsEffectSize(control, test,
                                              self.__effect_size,
                                              self.__is_paired,
                                              self.__ci,
                                              self.__resamples,
                                              self.__permutation_count,
-                                             self.__random_seed)
+                                             self.__random_seed,
+                                             self.__memory_limit,
+                                             self.__n_jobs,
+                                             self.__legacy_rng,
+                                             self.__bootstrap_dtype,
+                                             self.__store_bootstraps,
+                                             shared.get("bootstraps"),
+                                             shared.get("jackknives"),
+                                             mc_tolerance=self.__mc_tolerance,
+                                             sampling=self.__sampling,
+                                             permutation_stop_after=self.__permutation_stop_after,
+                                             store_permutations=self.__store_permutations)
                 r_dict = result.to_dict()
+                permutation_kinds.add((result.permutation_count,
+                                       result.permutation_exact,
+                                       result.permutation_stopped_early))
 
                 r_dict["control"]   = cname
                 r_dict["test"]      = tname
                 r_dict["control_N"] = int(len(control))
                 r_dict["test_N"]    = int(len(test))
-                
-                out.append(r_dict)
+
+                if np.ndim(self.__ci) > 0:
+                    # One row for each confidence level.
+                    for k in range(len(self.__ci)):
+                        level_dict = dict(r_dict)
+                        for col in ["ci", "alpha",
+                                    "bca_low", "bca_high", "bca_interval_idx",
+                                    "bca_low_mc_se", "bca_high_mc_se",
+                                    "pct_low", "pct_high", "pct_interval_idx"]:
+                            level_dict[col] = r_dict[col][k]
+                        out.append(level_dict)
+                else:
+                    out.append(r_dict)
 
                 if j == len(idx)-1 and ix == len(current_tuple)-2:
                     resamp_count = True
@@ -1382,6 +1965,13 @@ class EffectSizeDataFrame(object):
 
                 reprs.append(text_repr)
 
+        # The definition of the p-values describes the permutation test of
+        # the last comparison only.
+        if len(permutation_kinds) > 1:
+            reprs[-1] += "\nThe number of reshuffles differed between " + \
+                         "comparisons; see the `permutation_count` " + \
+                         "column of the results."
+
         varname = get_varname(self.__dabest_obj)
         lastline = "To get the results of all valid statistical tests, " +\
         "use `{}.{}.statistical_tests`".format(varname, self.__effect_size)
@@ -1398,11 +1988,13 @@ class EffectSizeDataFrame(object):
                             'difference', 'ci',
 
                             'bca_low', 'bca_high', 'bca_interval_idx',
+                            'bca_low_mc_se', 'bca_high_mc_se',
                             'pct_low', 'pct_high', 'pct_interval_idx',
                             
                             'bootstraps', 'resamples', 'random_seed',
                             
-                            'pvalue_permutation', 'permutation_count',
+                            'pvalue_permutation', 'pvalue_permutation_mc_se',
+                            'permutation_count',
                             
                             'pvalue_welch',
                             'statistic_welch',
@@ -1684,6 +2276,11 @@ class EffectSizeDataFrame(object):
 
         from .plotter import EffectSizeDataFramePlotter
 
+        if self.__store_bootstraps is False:
+            err1 = "The bootstraps were not stored (`store_bootstraps` is False),"
+            err2 = "so the effect sizes cannot be plotted."
+            raise ValueError(" ".join([err1, err2]))
+
         if hasattr(self, "results") is False:
             self.__pre_calc()
 
@@ -1704,6 +2301,33 @@ class EffectSizeDataFrame(object):
             self.__pre_calc()
             return self.__results
 
+    @property
+    def _has_results(self):
+        """Whether the results have already been computed."""
+        try:
+            self.__results
+            return True
+        except AttributeError:
+            return False
+
+
+
+    @property
+    def _plot_results(self):
+        """
+        The results from which the effect sizes are plotted, with one row
+        per comparison. If several confidence levels were computed, the
+        intervals at the first are plotted.
+        """
+        import numpy as np
+
+        results = self.results
+        if np.ndim(self.__ci) == 0:
+            return results
+
+        first_level = results[results.ci == self.__ci[0]]
+        return first_level.reset_index(drop=True)
+
 
 
     @property
@@ -1768,6 +2392,74 @@ class EffectSizeDataFrame(object):
         """
         return self.__random_seed
 
+    @property
+    def memory_limit(self):
+        """
+        The approximate maximum number of bytes used to hold bootstrap
+        resamples at any one time.
+        """
+        return self.__memory_limit
+
+    @property
+    def n_jobs(self):
+        """
+        The number of worker processes used to compute each bootstrap.
+        """
+        return self.__n_jobs
+
+    @property
+    def legacy_rng(self):
+        """
+        Whether resamples are drawn with the legacy `numpy.random.RandomState`
+        generator.
+        """
+        return self.__legacy_rng
+
+    @property
+    def bootstrap_dtype(self):
+        """
+        The dtype the bootstraps are stored in. If None, they are float64.
+        """
+        return self.__bootstrap_dtype
+
+    @property
+    def store_bootstraps(self):
+        """
+        Whether the sorted bootstraps of each comparison are stored.
+        """
+        return self.__store_bootstraps
+
+    @property
+    def mc_tolerance(self):
+        """
+        The tolerance for the Monte Carlo error of the BCa interval limits,
+        if the number of resamples is chosen adaptively.
+        """
+        return self.__mc_tolerance
+
+    @property
+    def sampling(self):
+        """
+        How the bootstrap resamples are drawn: "ordinary", "balanced" or
+        "antithetic".
+        """
+        return self.__sampling
+
+    @property
+    def permutation_stop_after(self):
+        """
+        The number of permutations more extreme than the observed effect
+        size after which the permutation tests stop, if they are sequential.
+        """
+        return self.__permutation_stop_after
+
+    @property
+    def store_permutations(self):
+        """
+        Whether the permuted effect sizes of each permutation test are kept.
+        """
+        return self.__store_permutations
+
     @property
     def effect_size(self):
         """The type of effect size being computed."""
@@ -1812,11 +2504,31 @@ class PermutationTest:
         'mean_diff', 'median_diff', 'cohens_d', 'hedges_g', or 'cliffs_delta'
     is_paired : boolean, default False
     permutation_count : int, default 10000
-        The number of permutations (reshuffles) to perform.
+        The number of permutations (reshuffles) to perform. If there are
+        no more distinct relabelings than this, they are all evaluated
+        instead (see `exact`).
     random_seed : int, default 12345
         `random_seed` is used to seed the random number generator during
         bootstrap resampling. This ensures that the generated permutations
         are replicable.
+    legacy_rng : boolean, default False
+        If True, the permutations are drawn one at a time with
+        `numpy.random.RandomState`, reproducing the p-values of dabest
+        v0.3.1 and earlier exactly.
+    stop_after : int, default None
+        If given, the test is sequential (Besag & Clifford, 1991): drawing
+        permutations stops as soon as `stop_after` of them are more extreme
+        than the observed effect size, and the p-value is `stop_after`
+        divided by the number of permutations drawn. Clearly
+        non-significant differences thus take only a few permutations. If
+        fewer than `stop_after` of all `permutation_count` permutations are
+        more extreme, the p-value is as usual. Exact tests are not stopped.
+    store_permutations : boolean, default True
+        If False, the effect sizes of the permutations are not kept at
+        all, only the number of them that are more extreme than the
+        observed effect size, and `permutations` is None. If True, a
+        sequential test keeps the permutations it draws in an array that
+        grows as they are drawn, rather than one of `permutation_count`.
 
 
     Returns
@@ -1828,6 +2540,30 @@ class PermutationTest:
     
     effect_size : string
         The type of effect size reported.
+
+    pvalue : float
+        The permutation p-value.
+
+    pvalue_mc_se : float
+        The Monte Carlo standard error of the p-value, ie. its standard
+        deviation over repeated tests with different random seeds. This is
+        zero for exact tests.
+
+    stopped_early : boolean
+        Whether a sequential test (see `stop_after`) stopped before
+        `permutation_count` permutations were drawn, in which case
+        `permutation_count` is the number that were.
+
+    exact : boolean
+        Whether the test is exact. If there are no more distinct ways of
+        relabeling the observations (splits of the pooled observations
+        into a control and a test group, or patterns of swapped pairs)
+        than `permutation_count`, every one of them is evaluated instead of
+        random permutations, and `permutation_count` is their number. The
+        p-value is then the proportion of relabelings whose effect size is
+        at least as extreme as the observed one, including the observed
+        labeling and ties.
+        Tests drawn with `legacy_rng` are never exact.
         
         
     Notes
@@ -1863,11 +2599,16 @@ class PermutationTest:
                  effect_size, is_paired,
                  permutation_count=5000, 
                  random_seed=12345,
+                 legacy_rng=False,
+                 stop_after=None,
+                 store_permutations=True,
                  **kwargs):
     
         import numpy as np
         from numpy.random import PCG64, RandomState
         from ._stats_tools.effsize import two_group_difference
+        from ._stats_tools.confint_2group_diff import \
+            _batch_two_group_difference, _batch_sign_flip_difference
 
         self.__permutation_count = permutation_count
 
@@ -1875,23 +2616,218 @@ class PermutationTest:
         if is_paired and len(control) != len(test):
             raise ValueError("The two arrays do not have the same length.")
 
-        # Initialise random number generator.
-        # rng = np.random.default_rng(seed=random_seed)
-        rng = RandomState(PCG64(random_seed))
+        if stop_after is not None and stop_after < 1:
+            raise ValueError("`stop_after` must be a positive integer.")
 
         # Set required constants and variables
         control = np.array(control)
         test = np.array(test)
 
-        control_sample = control.copy()
-        test_sample    = test.copy()
-
         BAG = np.array([*control, *test])
         CONTROL_LEN = int(len(control))
         EXTREME_COUNT = 0.
         THRESHOLD = np.abs(two_group_difference(control, test, 
                                                 is_paired, effect_size))
-        self.__permutations = []
+        self.__exact = False
+        self.__stopped_early = False
+
+        if legacy_rng:
+            # Initialise random number generator.
+            rng = RandomState(PCG64(random_seed))
+            shuffles = self.__legacy_shuffles(rng, control, test, BAG,
+                                              is_paired, permutation_count)
+            permutations = self.__permutation_buffer(permutation_count,
+                                                     stop_after,
+                                                     store_permutations)
+            drawn = 0
+
+            for control_sample, test_sample in shuffles:
+
+                es = two_group_difference(control_sample, test_sample, 
+                                        False, effect_size)
+                
+                if permutations is not None:
+                    permutations = self.__reserve(permutations, drawn + 1,
+                                                  permutation_count)
+                    permutations[drawn] = es
+                drawn += 1
+
+                if np.abs(es) > THRESHOLD:
+                    EXTREME_COUNT += 1.
+
+                    if EXTREME_COUNT == stop_after:
+                        break
+
+        else:
+            rng = np.random.default_rng(random_seed)
+            # The batched effect sizes need the NaNs to have been dropped.
+            has_nan = np.isnan(BAG).any()
+
+            relabelings = self.__count_relabelings(len(BAG), CONTROL_LEN,
+                                                   is_paired,
+                                                   permutation_count)
+
+            # Enumerating every relabeling is no more work than drawing
+            # the permutations, and gives the exact p-value.
+            if relabelings is not None:
+                self.__exact = True
+                permutation_count = relabelings
+                self.__permutation_count = relabelings
+
+                # The p-value of an exact test is the proportion of
+                # relabelings at least as extreme as the observed one,
+                # which include the observed labeling itself, so it is
+                # at least 1 / relabelings. Effect sizes that only differ
+                # from the observed one by rounding error are ties.
+                THRESHOLD = THRESHOLD * (1 - 1e-10)
+
+                if is_paired:
+                    shuffles = self.__all_sign_flips(CONTROL_LEN)
+                else:
+                    shuffles = self.__all_splits(CONTROL_LEN, len(test),
+                                                 relabelings)
+
+                stop_after = None
+
+            # Sequential tests start with small blocks, so those that stop
+            # early do not evaluate many more permutations than needed.
+            elif is_paired:
+                shuffles = self.__sign_flips(rng, CONTROL_LEN,
+                                             permutation_count,
+                                             growing=stop_after is not None)
+            else:
+                shuffles = self.__shuffles(rng, CONTROL_LEN, len(test),
+                                           permutation_count,
+                                           growing=stop_after is not None)
+
+            # The effect sizes of the permutations are filled in as they
+            # are evaluated, a block at a time.
+            permutations = self.__permutation_buffer(permutation_count,
+                                                     stop_after,
+                                                     store_permutations)
+            drawn = 0
+
+            for shuffle in shuffles:
+                if is_paired and has_nan:
+                    es = np.array([two_group_difference(
+                                        np.where(swaps, test, control),
+                                        np.where(swaps, control, test),
+                                        False, effect_size)
+                                   for swaps in shuffle])
+                elif is_paired:
+                    es = _batch_sign_flip_difference(control, test, shuffle,
+                                                     effect_size)
+                elif has_nan:
+                    es = np.array([two_group_difference(BAG[c], BAG[t],
+                                                        False, effect_size)
+                                   for c, t in zip(*shuffle)])
+                else:
+                    es = _batch_two_group_difference(BAG, BAG, *shuffle,
+                                                     False, effect_size)
+
+                if self.__exact:
+                    extreme = np.abs(es) >= THRESHOLD
+                else:
+                    extreme = np.abs(es) > THRESHOLD
+                extreme_in_block = np.count_nonzero(extreme)
+                stopping = stop_after is not None and \
+                           EXTREME_COUNT + extreme_in_block >= stop_after
+
+                if stopping:
+                    # Keep the permutations up to the one at which the
+                    # sequential test stops.
+                    extreme_in_block = int(stop_after - EXTREME_COUNT)
+                    es = es[:np.flatnonzero(extreme)[extreme_in_block - 1] + 1]
+
+                if permutations is not None:
+                    permutations = self.__reserve(permutations,
+                                                  drawn + len(es),
+                                                  permutation_count)
+                    permutations[drawn:drawn + len(es)] = es
+                drawn += len(es)
+                EXTREME_COUNT += extreme_in_block
+
+                if stopping:
+                    break
+
+        if stop_after is not None and EXTREME_COUNT == stop_after and \
+           drawn < permutation_count:
+            self.__stopped_early = True
+            permutation_count = drawn
+            self.__permutation_count = permutation_count
+
+        if permutations is None:
+            self.__permutations = None
+        elif drawn < len(permutations):
+            # Release the space allotted to the permutations not drawn.
+            self.__permutations = permutations[:drawn].copy()
+        else:
+            self.__permutations = permutations
+
+        self.pvalue = EXTREME_COUNT / permutation_count
+
+        if self.__exact:
+            self.pvalue_mc_se = 0.
+        elif self.__stopped_early:
+            # The number of permutations drawn is negative binomial.
+            self.pvalue_mc_se = np.sqrt(self.pvalue**2 * (1 - self.pvalue) /
+                                        stop_after)
+        else:
+            # The extreme count is binomial, which gives the Monte Carlo
+            # standard error of the p-value directly.
+            self.pvalue_mc_se = np.sqrt(self.pvalue * (1 - self.pvalue) /
+                                        permutation_count)
+
+
+
+    @staticmethod
+    def __permutation_buffer(permutation_count, stop_after,
+                             store_permutations):
+        """
+        Returns the array the effect sizes of the permutations are kept
+        in: None if they are not to be stored, an empty array (enlarged by
+        `__reserve` as they are drawn) if the test is sequential, as it may
+        stop long before `permutation_count`, or else an array of
+        `permutation_count` values.
+        """
+        import numpy as np
+
+        if store_permutations is False:
+            return None
+        elif stop_after is not None:
+            return np.empty(0)
+        return np.empty(int(permutation_count))
+
+
+
+    @staticmethod
+    def __reserve(buffer, size, limit):
+        """
+        Returns `buffer`, or a copy of it enlarged to hold at least `size`
+        values if it cannot. The copy at least doubles in size, up to
+        `limit` values, so filling it takes amortized linear time.
+        """
+        import numpy as np
+
+        if size <= len(buffer):
+            return buffer
+
+        enlarged = np.empty(int(min(limit, max(size, 2 * len(buffer)))))
+        enlarged[:len(buffer)] = buffer
+        return enlarged
+
+
+
+    @staticmethod
+    def __legacy_shuffles(rng, control, test, BAG,
+                          is_paired, permutation_count):
+        """
+        Yields the reshuffled control and test samples one permutation at
+        a time, drawn with the legacy `RandomState` generator `rng`.
+        """
+        control_sample = control.copy()
+        test_sample    = test.copy()
+        CONTROL_LEN    = int(len(control))
 
         for i in range(int(permutation_count)):
             
@@ -1914,16 +2850,165 @@ class PermutationTest:
                 control_sample = shuffled[:CONTROL_LEN]
                 test_sample    = shuffled[CONTROL_LEN:]
 
+            yield control_sample, test_sample
 
-            es = two_group_difference(control_sample, test_sample, 
-                                    False, effect_size)
-            
-            self.__permutations.append(es)
 
-            if np.abs(es) > THRESHOLD:
-                EXTREME_COUNT += 1.
 
-        self.pvalue = EXTREME_COUNT / permutation_count
+    @staticmethod
+    def __block_size(width, block_size=1000):
+        """
+        Returns the number of permutations to draw at a time, such that a
+        block of `width` values per permutation fits in roughly
+        `DEFAULT_MEMORY_LIMIT` bytes, up to `block_size`.
+        """
+        from ._stats_tools.confint_2group_diff import DEFAULT_MEMORY_LIMIT
+
+        return max(1, min(block_size, DEFAULT_MEMORY_LIMIT // (32 * width)))
+
+
+
+    @staticmethod
+    def __block_sizes(permutation_count, width, growing=False,
+                      first_block=100):
+        """
+        Yields the number of permutations to draw in each block. If
+        `growing` is True, the blocks start with `first_block`
+        permutations and double in size, up to `__block_size(width)`.
+        """
+        largest = PermutationTest.__block_size(width)
+        size = min(first_block, largest) if growing else largest
+
+        drawn = 0
+        while drawn < permutation_count:
+            size = min(size, permutation_count - drawn)
+            yield size
+            drawn += size
+            size = min(2 * size, largest)
+
+
+
+    @staticmethod
+    def __shuffles(rng, control_len, test_len, permutation_count,
+                   growing=False):
+        """
+        Yields the reshuffled control and test samples in blocks, drawn
+        from the `numpy.random.Generator` `rng`. Each block is a pair of
+        2-D arrays of indexes into the concatenated control and test
+        samples (the bag), holding the reshuffled control and test samples
+        respectively, with one permutation per row.
+        """
+        import numpy as np
+
+        CONTROL_LEN = int(control_len)
+        BAG_IDX = np.arange(CONTROL_LEN + int(test_len))
+        block_sizes = PermutationTest.__block_sizes(int(permutation_count),
+                                                    len(BAG_IDX), growing)
+
+        for size in block_sizes:
+            # Shuffle a copy of the bag in every row. The shuffle depends
+            # only on the length of the bag, so shuffling its indexes gives
+            # the same permutations as shuffling its values.
+            shuffled = rng.permuted(np.tile(BAG_IDX, (size, 1)), axis=1)
+            yield shuffled[:, :CONTROL_LEN], shuffled[:, CONTROL_LEN:]
+
+
+
+    @staticmethod
+    def __sign_flips(rng, pair_count, permutation_count, growing=False):
+        """
+        Yields the paired permutations in blocks, drawn from the
+        `numpy.random.Generator` `rng`. Each block is a boolean 2-D array
+        with one permutation per row, marking the pairs whose control and
+        test values are swapped (ie. the differences whose signs are
+        flipped). Each pair is swapped independently, with a probability
+        of one half.
+        """
+        block_sizes = PermutationTest.__block_sizes(int(permutation_count),
+                                                    pair_count, growing)
+
+        for size in block_sizes:
+            yield rng.random((size, pair_count)) < 0.5
+
+
+
+    @staticmethod
+    def __count_relabelings(bag_len, control_len, is_paired, limit):
+        """
+        Returns the number of distinct relabelings of the observations
+        (2 ** pairs if `is_paired`, else bag_len choose control_len), or
+        None if there are more than `limit`. The binomial coefficient is
+        built up one factor at a time, and abandoned as soon as it passes
+        `limit`, so large groups are dismissed in a few steps.
+        """
+        limit = int(limit)
+
+        if is_paired:
+            # 2 ** control_len <= limit, without forming 2 ** control_len.
+            if limit >= 1 and limit.bit_length() > control_len:
+                return 2 ** control_len
+            return None
+
+        k = min(control_len, bag_len - control_len)
+        count = 1
+        for i in range(1, k + 1):
+            # Each step gives (bag_len - k + i) choose i, an integer.
+            count = count * (bag_len - k + i) // i
+            if count > limit:
+                return None
+
+        return count if count <= limit else None
+
+
+
+    @staticmethod
+    def __all_splits(control_len, test_len, relabelings):
+        """
+        Yields every split of the bag into a control group of `control_len`
+        and a test group of `test_len` observations, in blocks, in the same
+        form as `__shuffles`. `relabelings` is the number of splits.
+        """
+        import numpy as np
+        from itertools import chain, combinations
+
+        bag_len = control_len + test_len
+        block_size = PermutationTest.__block_size(bag_len)
+        splits = combinations(range(bag_len), control_len)
+
+        remaining = relabelings
+        while remaining > 0:
+            size = min(block_size, remaining)
+            remaining -= size
+
+            control_idx = np.fromiter(chain.from_iterable(
+                                        next(splits) for i in range(size)),
+                                      dtype=np.intp, count=size * control_len)
+            control_idx = control_idx.reshape(size, control_len)
+
+            # The test group is the rest of the bag.
+            in_control = np.zeros((size, bag_len), dtype=bool)
+            np.put_along_axis(in_control, control_idx, True, axis=1)
+            test_idx = np.nonzero(~in_control)[1].reshape(size, test_len)
+
+            yield control_idx, test_idx
+
+
+
+    @staticmethod
+    def __all_sign_flips(pair_count):
+        """
+        Yields every pattern of swapped pairs, in blocks, in the same form
+        as `__sign_flips`: row k swaps the pairs at the set bits of k.
+        """
+        import numpy as np
+
+        block_size = PermutationTest.__block_size(pair_count)
+        bits = np.arange(pair_count)
+
+        for start in range(0, 2 ** pair_count, block_size):
+            stop = min(start + block_size, 2 ** pair_count)
+            patterns = np.arange(start, stop, dtype=np.int64)
+            yield (patterns[:, None] >> bits) & 1 == 1
+
 
 
     def __repr__(self):
@@ -1942,6 +3027,25 @@ class PermutationTest:
     @property
     def permutations(self):
         """
-        The effect sizes of all the permutations in a list.
+        The effect sizes of all the permutations in an array, or None if
+        they were not stored.
+        """
+        return self.__permutations
+
+
+    @property
+    def stopped_early(self):
+        """
+        Whether the sequential test stopped before all of the permutations
+        requested were drawn.
+        """
+        return self.__stopped_early
+
+
+    @property
+    def exact(self):
+        """
+        Whether every distinct relabeling was evaluated, in which case the
+        p-value is exact.
         """
-        return self.__permutations
\ No newline at end of file
+        return self.__exact
\ No newline at end of file
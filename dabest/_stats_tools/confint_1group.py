@@ -6,19 +6,36 @@
 A range of functions to compute bootstraps for a single sample.
 """
 
-def create_bootstrap_indexes(array, resamples=5000, random_seed=12345):
+def create_bootstrap_indexes(array, resamples=5000, random_seed=12345,
+                             legacy_rng=False):
     """Given an array-like, returns a generator of bootstrap indexes
     to be used for resampling.
-    """i
+
+    The indexes are drawn one resample at a time as they are iterated
+    over, with a `numpy.random.Generator`, so only one resample is held in
+    memory at a time. If `legacy_rng` is True, they are instead drawn from
+    `RandomState(PCG64(random_seed))`, reproducing the indexes of earlier
+    versions.
+    """
     import numpy as np
     from numpy.random import PCG64, RandomState
-    rng = RandomState(PCG64(random_seed))
-    
-    indexes = range(0, len(array))
 
-    out = (rng.choice(indexes, len(indexes), replace=True)
-            for i in range(0, resamples))
-            
+    if legacy_rng:
+        rng = RandomState(PCG64(random_seed))
+
+        indexes = range(0, len(array))
+
+        out = (rng.choice(indexes, len(indexes), replace=True)
+                for i in range(0, resamples))
+
+    else:
+        rng = np.random.default_rng(random_seed)
+
+        # Generator draws are sequential, so drawing a row at a time gives
+        # the same indexes as drawing every resample at once.
+        out = (rng.integers(0, len(array), size=len(array))
+                for i in range(0, resamples))
+
     # Reset RNG
     # rng = RandomState(MT19937())
     return out
@@ -28,11 +45,19 @@ def create_bootstrap_indexes(array, resamples=5000, random_seed=12345):
 def compute_1group_jackknife(x, func, *args, **kwargs):
     """
     Returns the jackknife bootstraps for func(x).
+
+    If func is `numpy.median`, the leave-one-out medians are found from
+    the order statistics of x, instead of from n copies of the data.
     """
+    import numpy as np
     from . import confint_2group_diff as ci_2g
-    jackknives = [i for i in ci_2g.create_jackknife_indexes(x)]
+
+    if func is np.median and not args and not kwargs:
+        return ci_2g._jackknife_median(np.asarray(x))
+
+    # The jackknife indexes are created one sample at a time.
+    jackknives = ci_2g.create_jackknife_indexes(x)
     out = [func(x[j], *args, **kwargs) for j in jackknives]
-    del jackknives # memory management.
     return out
 
 
@@ -44,14 +69,15 @@ def compute_1group_acceleration(jack_dist):
 
 
 def compute_1group_bootstraps(x, func, resamples=5000, random_seed=12345,
-                             *args, **kwargs):
+                              *args, legacy_rng=False, **kwargs):
     """Bootstraps func(x), with the number of specified resamples."""
 
     import numpy as np
     
     # Create bootstrap indexes.
     boot_indexes = create_bootstrap_indexes(x, resamples=resamples,
-                                            random_seed=random_seed)
+                                            random_seed=random_seed,
+                                            legacy_rng=legacy_rng)
 
     out = [func(x[b], *args, **kwargs) for b in boot_indexes]
     
@@ -71,7 +97,7 @@ def compute_1group_bias_correction(x, bootstraps, func, *args, **kwargs):
 
 
 def summary_ci_1group(x, func, resamples=5000, alpha=0.05, random_seed=12345,
-                      sort_bootstraps=True, *args, **kwargs):
+                      sort_bootstraps=True, *args, legacy_rng=False, **kwargs):
     """
     Given an array-like x, returns func(x), and a bootstrap confidence
     interval of func(x).
@@ -97,7 +123,11 @@ def summary_ci_1group(x, func, resamples=5000, alpha=0.05, random_seed=12345,
         reported are replicable.
         
     sort_bootstraps: boolean, default True
-    
+
+    legacy_rng: boolean, default False
+        If True, the bootstrap resamples are drawn with the legacy
+        `RandomState` generator, reproducing the results of earlier
+        versions.
 
 
     Returns
@@ -125,6 +155,7 @@ def summary_ci_1group(x, func, resamples=5000, alpha=0.05, random_seed=12345,
 
     boots = compute_1group_bootstraps(x, func, resamples=resamples,
                                       random_seed=random_seed,
+                                      legacy_rng=legacy_rng,
                                       *args, **kwargs)
     bias = compute_1group_bias_correction(x, boots, func)
 
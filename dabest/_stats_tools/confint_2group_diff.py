@@ -7,6 +7,20 @@ A range of functions to compute bootstraps for the mean difference
 between two groups.
 """
 
+# The default upper bound, in bytes, on the memory used to hold
+# bootstrap resamples at any one time.
+DEFAULT_MEMORY_LIMIT = 256 * 1024**2
+
+# The number of bootstrap resamples drawn from each child random number
+# stream spawned from the random seed.
+RESAMPLES_PER_STREAM = 250
+
+# The number of bootstrap resamples drawn in each round of an adaptive
+# bootstrap, before the Monte Carlo error of the interval is checked.
+ADAPTIVE_BATCH_RESAMPLES = 1000
+
+
+
 def create_jackknife_indexes(data):
     """
     Given an array-like, creates a jackknife bootstrap.
@@ -42,49 +56,290 @@ def create_repeated_indexes(data):
 
 
 def _create_two_group_jackknife_indexes(x0, x1, is_paired):
-    """Creates the jackknife bootstrap for 2 groups."""
+    """
+    Creates the jackknife bootstrap for 2 groups.
+
+    Returns an iterator of (control indexes, test indexes) pairs. The
+    indexes are created as they are iterated over, so only one jackknife
+    sample is held in memory at a time.
+    """
+    from itertools import chain
 
     if is_paired and len(x0) == len(x1):
-        out = list(zip([j for j in create_jackknife_indexes(x0)],
-                       [i for i in create_jackknife_indexes(x1)]
-                       )
-                   )
+        return zip(create_jackknife_indexes(x0),
+                   create_jackknife_indexes(x1))
+
+    jackknife_c = zip(create_jackknife_indexes(x0),
+                      create_repeated_indexes(x1))
+
+    jackknife_t = zip(create_repeated_indexes(x0),
+                      create_jackknife_indexes(x1))
+
+    return chain(jackknife_c, jackknife_t)
+
+
+
+def _jackknife_mean_var(x):
+    """
+    Returns the mean and the variance (with N-1 degrees of freedom) of x
+    with each observation left out in turn, from the totals of x.
+    """
+    import numpy as np
+
+    n = len(x)
+
+    # Centre x so the sums of squares do not lose precision.
+    mean = np.mean(x)
+    centred = x - mean
+    sq_dev = np.sum(centred ** 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        loo_mean = mean - centred / (n - 1)
+        if n > 2:
+            loo_var = (sq_dev - (centred ** 2) * n / (n - 1)) / (n - 2)
+        else:
+            loo_var = np.repeat(np.nan, n)
+
+    # Rounding can leave a tiny non-zero variance when the observations
+    # left in are identical; set these to exactly zero, as np.var would.
+    if n > 2:
+        suspect = np.flatnonzero(loo_var <= 1e-8 * sq_dev / n)
+        if len(suspect) > 0:
+            order = np.argsort(x, kind="mergesort")
+            x_sorted = x[order]
+            ranks = np.empty(n, dtype=np.intp)
+            ranks[order] = np.arange(n)
+            # The smallest and largest of the observations left in.
+            lowest = np.where(ranks[suspect] == 0, x_sorted[1], x_sorted[0])
+            highest = np.where(ranks[suspect] == n - 1,
+                               x_sorted[n - 2], x_sorted[n - 1])
+            loo_var[suspect[lowest == highest]] = 0.
+
+    return loo_mean, loo_var
+
+
+
+def _mean_based_jackknife(x0, x1, is_paired, effect_size):
+    """
+    Returns the jackknife of the mean difference, Cohen's d or Hedges' g
+    in closed form, in the same order as `_create_two_group_jackknife_indexes`.
+
+    The leave-one-out means and variances of each group follow from its
+    totals, so this takes O(n) time, rather than recomputing the effect
+    size for each of the n leave-one-out copies of the data.
+    """
+    import numpy as np
+    from . import effsize as __es
+
+    x0_len = len(x0)
+    x1_len = len(x1)
+
+    if is_paired:
+        if x0_len != x1_len:
+            raise ValueError("The two arrays do not have the same length.")
+
+        # Each pair is left out in turn.
+        M, _ = _jackknife_mean_var(x1 - x0)
+        if effect_size == "mean_diff":
+            return M
+
+        _, x0_loo_var = _jackknife_mean_var(x0)
+        _, x1_loo_var = _jackknife_mean_var(x1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d = M / np.sqrt((x0_loo_var + x1_loo_var) / 2)
+
     else:
-        jackknife_c = list(zip([j for j in create_jackknife_indexes(x0)],
-                               [i for i in create_repeated_indexes(x1)]
-                              )
-                          )
-
-        jackknife_t = list(zip([i for i in create_repeated_indexes(x0)],
-                               [j for j in create_jackknife_indexes(x1)]
-                              )
-                          )
-        out = jackknife_c + jackknife_t
-        del jackknife_c
-        del jackknife_t
+        # Each control observation is left out in turn, and then each test
+        # observation. As in `_create_two_group_jackknife_indexes`, only the
+        # first min(x0_len, x1_len) observations of each group are left out.
+        m = min(x0_len, x1_len)
+        x0_loo_mean, x0_loo_var = [a[:m] for a in _jackknife_mean_var(x0)]
+        x1_loo_mean, x1_loo_var = [a[:m] for a in _jackknife_mean_var(x1)]
+
+        M = np.concatenate([np.mean(x1) - x0_loo_mean,
+                            x1_loo_mean - np.mean(x0)])
+        if effect_size == "mean_diff":
+            return M
+
+        x0_sq_dev = (x0_len - 1) * np.var(x0, ddof=1)
+        x1_sq_dev = (x1_len - 1) * np.var(x1, ddof=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pooled_sq_dev = np.concatenate([
+                                (x0_len - 2) * x0_loo_var + x1_sq_dev,
+                                x0_sq_dev + (x1_len - 2) * x1_loo_var])
+            d = M / np.sqrt(pooled_sq_dev / (x0_len + x1_len - 3))
+
+    if effect_size == "cohens_d":
+        return d
+
+    elif effect_size == "hedges_g":
+        # The correction factor depends only on the total number of
+        # observations, which is the same for every jackknife sample.
+        if is_paired:
+            factor = __es._compute_hedges_correction_factor(x0_len - 1,
+                                                            x1_len - 1)
+        else:
+            factor = __es._compute_hedges_correction_factor(x0_len - 1,
+                                                            x1_len)
+        return factor * d
 
-    return out
+    else:
+        err = "The effect size '{}' is not a mean-based effect size."
+        raise ValueError(err.format(effect_size))
+
+
+
+def _jackknife_median(x):
+    """
+    Returns the median of x with each observation left out in turn.
+
+    Leaving out one observation shifts the middle of the sorted data by at
+    most one place, so each leave-one-out median is one of two or three
+    values, according to whether the observation left out lies below, at
+    or above the middle. Sorting x once, this takes O(n log n) time.
+    """
+    import numpy as np
+
+    n = len(x)
+    if n <= 1:
+        return np.repeat(np.nan, n)
+
+    order = np.argsort(x, kind="stable")
+    x_sorted = x[order]
+    ranks = np.empty(n, dtype=np.intp)
+    ranks[order] = np.arange(n)
+
+    k = n // 2
+    if n % 2 == 0:
+        # n - 1 values remain, so each median is a single order statistic.
+        return np.where(ranks < k, x_sorted[k], x_sorted[k - 1])
+
+    below = (x_sorted[k] + x_sorted[k + 1]) / 2
+    middle = (x_sorted[k - 1] + x_sorted[k + 1]) / 2
+    above = (x_sorted[k - 1] + x_sorted[k]) / 2
+
+    return np.where(ranks < k, below, np.where(ranks == k, middle, above))
+
+
+
+def _median_jackknife(x0, x1, is_paired):
+    """
+    Returns the jackknife of the median difference from the leave-one-out
+    medians of each group, in the same order as
+    `_create_two_group_jackknife_indexes`.
+    """
+    import numpy as np
+
+    if is_paired:
+        if len(x0) != len(x1):
+            raise ValueError("The two arrays do not have the same length.")
+        # Each pair is left out in turn.
+        return _jackknife_median(x1 - x0)
+
+    # As in `_create_two_group_jackknife_indexes`, only the first
+    # min(len(x0), len(x1)) observations of each group are left out.
+    m = min(len(x0), len(x1))
+    return np.concatenate([np.median(x1) - _jackknife_median(x0)[:m],
+                           _jackknife_median(x1)[:m] - np.median(x0)])
+
+
+
+def _cliffs_delta_jackknife(x0, x1):
+    """
+    Returns the jackknife of Cliff's delta for 2 unpaired groups, in the
+    same order as `_create_two_group_jackknife_indexes`.
+
+    Each observation's share of the Mann-Whitney U statistic (the number
+    of observations of the other group it lies above, with ties counted
+    as one half) follows from its position amongst the other group's
+    sorted values. Leaving it out removes just that share from U, so the
+    data is only ranked once.
+    """
+    import numpy as np
+
+    x0_len = len(x0)
+    x1_len = len(x1)
+
+    x0_sorted = np.sort(x0)
+    x1_sorted = np.sort(x1)
+
+    # Twice each observation's share of U, which is an integer: 2 for
+    # each observation of the other group it is above, and 1 for each tie.
+    x0_twice = (2 * x1_len - np.searchsorted(x1_sorted, x0, side="left")
+                - np.searchsorted(x1_sorted, x0, side="right"))
+    x1_twice = (np.searchsorted(x0_sorted, x1, side="left")
+                + np.searchsorted(x0_sorted, x1, side="right"))
+    U_twice = np.sum(x1_twice)
+
+    # As in `_create_two_group_jackknife_indexes`, only the first
+    # min(x0_len, x1_len) observations of each group are left out.
+    m = min(x0_len, x1_len)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        control_left_out = (U_twice - x0_twice[:m]) / ((x0_len - 1) * x1_len)
+        test_left_out = (U_twice - x1_twice[:m]) / (x0_len * (x1_len - 1))
+
+    return np.concatenate([control_left_out, test_left_out]) - 1
 
 
 
 def compute_meandiff_jackknife(x0, x1, is_paired, effect_size):
     """
     Given two arrays, returns the jackknife for their effect size.
+
+    The jackknives of the mean difference, Cohen's d and Hedges' g are
+    computed in closed form from the totals of each group, and that of the
+    median difference from the order statistics of each group. Cliff's
+    delta is computed from how each observation ranks amongst the other
+    group.
+
+    If `effect_size` is a list of effect sizes, the jackknife resamples
+    are taken once and a dict mapping each effect size to its jackknife is
+    returned.
     """
+    import numpy as np
     from . import effsize as __es
 
-    jackknives = _create_two_group_jackknife_indexes(x0, x1, is_paired)
+    x0 = np.asarray(x0)
+    x1 = np.asarray(x1)
 
-    out = []
+    if isinstance(effect_size, str):
+        effect_sizes = [effect_size]
+    else:
+        effect_sizes = list(effect_size)
+
+    out = {}
+    looped = []
+    for es in effect_sizes:
+        if es in ("mean_diff", "cohens_d", "hedges_g"):
+            out[es] = _mean_based_jackknife(x0, x1, is_paired, es)
+        elif es == "median_diff":
+            out[es] = _median_jackknife(x0, x1, is_paired)
+        elif es == "cliffs_delta" and not is_paired:
+            out[es] = _cliffs_delta_jackknife(x0, x1)
+        else:
+            looped.append(es)
 
-    for j in jackknives:
-        x0_shuffled = x0[j[0]]
-        x1_shuffled = x1[j[1]]
+    if looped:
+        jackknives = _create_two_group_jackknife_indexes(x0, x1, is_paired)
 
-        es = __es.two_group_difference(x0_shuffled, x1_shuffled,
-                                       is_paired, effect_size)
-        out.append(es)
+        for es in looped:
+            out[es] = []
 
+        for j in jackknives:
+            x0_shuffled = x0[j[0]]
+            x1_shuffled = x1[j[1]]
+
+            for es in looped:
+                out[es].append(__es.two_group_difference(x0_shuffled,
+                                                         x1_shuffled,
+                                                         is_paired, es))
+
+        for es in looped:
+            out[es] = np.array(out[es])
+
+    if isinstance(effect_size, str):
+        return out[effect_size]
     return out
 
 
@@ -129,36 +384,815 @@ def _calc_accel(jack_dist):
 #     return out
 
 
-def compute_bootstrapped_diff(x0, x1, is_paired, effect_size,
-                              resamples=5000, random_seed=12345):
-    """Bootstraps the effect_size for 2 groups."""
-    
-    from . import effsize as __es
+def _create_two_group_bootstrap_indexes(rng, x0_len, x1_len, is_paired,
+                                        resamples):
+    """
+    Draws the bootstrap resample indexes for 2 groups as 2-D arrays, with
+    one resample per row, from the legacy `RandomState` generator `rng`.
+
+    The indexes are drawn in the same order as successive calls to
+    `rng.choice`, ie. the control resample and then the test resample for
+    each bootstrap, so the bootstraps are identical to those produced by
+    resampling one bootstrap at a time.
+    """
+    import numpy as np
+
+    if is_paired:
+        if x0_len != x1_len:
+            raise ValueError("The two arrays do not have the same length.")
+        random_idx = rng.randint(0, x0_len, size=(resamples, x0_len))
+        return random_idx, random_idx
+
+    if x0_len == x1_len:
+        # Both groups have the same bounds, so the interleaved control
+        # and test draws can be taken in a single call.
+        random_idx = rng.randint(0, x0_len, size=(resamples, 2, x0_len))
+        return random_idx[:, 0, :], random_idx[:, 1, :]
+
+    x0_idx = np.empty((resamples, x0_len), dtype=np.int_)
+    x1_idx = np.empty((resamples, x1_len), dtype=np.int_)
+    for i in range(resamples):
+        x0_idx[i] = rng.randint(0, x0_len, size=x0_len)
+        x1_idx[i] = rng.randint(0, x1_len, size=x1_len)
+
+    return x0_idx, x1_idx
+
+
+
+def _draw_two_group_bootstrap_indexes(x0_rng, x1_rng, x0_len, x1_len,
+                                      is_paired, resamples):
+    """
+    Draws the bootstrap resample indexes for 2 groups as 2-D arrays, with
+    one resample per row, from `numpy.random.Generator`s.
+
+    The control and test indexes are each drawn from their own stream
+    (`x0_rng` and `x1_rng` respectively), so the indexes do not depend on
+    how many resamples are drawn at a time. Paired resamples are drawn
+    from `x0_rng` only.
+    """
+    if is_paired:
+        if x0_len != x1_len:
+            raise ValueError("The two arrays do not have the same length.")
+        random_idx = x0_rng.integers(0, x0_len, size=(resamples, x0_len))
+        return random_idx, random_idx
+
+    x0_idx = x0_rng.integers(0, x0_len, size=(resamples, x0_len))
+    x1_idx = x1_rng.integers(0, x1_len, size=(resamples, x1_len))
+
+    return x0_idx, x1_idx
+
+
+
+def _draw_balanced_bootstrap_indexes(x0_rng, x1_rng, x0_len, x1_len,
+                                     is_paired, resamples):
+    """
+    Draws balanced bootstrap resample indexes for 2 groups as 2-D arrays,
+    with one resample per row: every observation appears exactly
+    `resamples` times in all, with the rows being successive runs of a
+    random permutation of `resamples` copies of the indexes.
+
+    As with `_draw_two_group_bootstrap_indexes`, paired resamples are
+    drawn from `x0_rng` only. The indexes are shuffled in place, so they
+    take up `_balanced_block_bytes` bytes.
+    """
+    import numpy as np
+
+    if is_paired and x0_len != x1_len:
+        raise ValueError("The two arrays do not have the same length.")
+
+    x0_idx = np.tile(np.arange(x0_len), resamples)
+    x0_rng.shuffle(x0_idx)
+    x0_idx = x0_idx.reshape(resamples, x0_len)
+    if is_paired:
+        return x0_idx, x0_idx
+
+    x1_idx = np.tile(np.arange(x1_len), resamples)
+    x1_rng.shuffle(x1_idx)
+
+    return x0_idx, x1_idx.reshape(resamples, x1_len)
+
+
+
+def _balanced_block_bytes(x0_len, x1_len, is_paired):
+    """
+    Returns the number of bytes taken up by the indexes of a block of
+    `RESAMPLES_PER_STREAM` balanced resamples, which are drawn at once.
+    """
+    if is_paired:
+        return 8 * RESAMPLES_PER_STREAM * x0_len
+    return 8 * RESAMPLES_PER_STREAM * (x0_len + x1_len)
+
+
+
+def _draw_antithetic_bootstrap_indexes(x0_rng, x1_rng, x0, x1,
+                                       is_paired, resamples):
+    """
+    Draws antithetic bootstrap resample indexes for 2 groups as 2-D arrays,
+    with one resample per row.
+
+    Half of the resamples are drawn as usual, in terms of the ranks of the
+    observations; each is then paired with its mirror image, in which
+    every rank r is replaced by n - 1 - r. A resample of the larger values
+    is thus paired with one of the smaller values, so the effect sizes of
+    the two are negatively correlated. Paired observations are ranked by
+    their differences.
+    """
     import numpy as np
-    from numpy.random import PCG64, RandomState
-    
-    # rng = RandomState(default_rng(random_seed))
-    rng = RandomState(PCG64(random_seed))
 
-    out = np.repeat(np.nan, resamples)
     x0_len = len(x0)
     x1_len = len(x1)
-    
-    for i in range(int(resamples)):
-        
+    half = (resamples + 1) // 2
+
+    x0_ranks, x1_ranks = _draw_two_group_bootstrap_indexes(x0_rng, x1_rng,
+                                            x0_len, x1_len, is_paired, half)
+    if is_paired:
+        x0_order = x1_order = np.argsort(x1 - x0, kind="stable")
+    else:
+        x0_order = np.argsort(x0, kind="stable")
+        x1_order = np.argsort(x1, kind="stable")
+
+    x0_idx = x0_order[np.concatenate([x0_ranks, x0_len - 1 - x0_ranks])]
+    x1_idx = x1_order[np.concatenate([x1_ranks, x1_len - 1 - x1_ranks])]
+
+    return x0_idx[:resamples], x1_idx[:resamples]
+
+
+
+def _index_slicer(x0_idx, x1_idx):
+    """
+    Returns a `draw_indexes` function (see `_bootstrap_from_stream`) that
+    hands out successive rows of the resample indexes `x0_idx` and
+    `x1_idx`, which were drawn beforehand.
+    """
+    drawn = [0]
+
+    def draw_indexes(resamples):
+        start = drawn[0]
+        drawn[0] = start + resamples
+        return x0_idx[start:start+resamples], x1_idx[start:start+resamples]
+
+    return draw_indexes
+
+
+
+def _count_rows(idx, n):
+    """
+    Given a 2-D array of indexes into an array of length n, returns the
+    number of times each index occurs in each row, as an array with one
+    row per row of `idx` and n columns.
+
+    For bootstrap resample indexes, each row is a draw from the
+    multinomial distribution with n trials and equal probabilities.
+    """
+    import numpy as np
+
+    rows = len(idx)
+    row_offsets = np.arange(rows)[:, None] * n
+    counts = np.bincount((idx + row_offsets).ravel(), minlength=rows * n)
+
+    return counts.reshape(rows, n)
+
+
+
+def _weighted_mean_var(x, weights):
+    """
+    Returns the mean and the variance (with N-1 degrees of freedom) of x
+    for every row of resample counts in `weights`, from the weighted sums
+    and weighted sums of squares of x.
+    """
+    import numpy as np
+
+    n = len(x)
+
+    # Centre x so the sums of squares do not lose precision.
+    shift = np.mean(x)
+    centred = x - shift
+    sums = weights @ np.column_stack([centred, centred ** 2])
+
+    mean = shift + (sums[:, 0] / n)
+    var = (sums[:, 1] - (sums[:, 0] ** 2) / n) / (n - 1)
+
+    # Rounding can leave a tiny non-zero variance when every value in a
+    # resample is identical; set these to exactly zero, as np.var would.
+    suspect = np.flatnonzero(var <= 1e-8 * np.mean(centred ** 2))
+    if len(suspect) > 0:
+        order = np.argsort(x, kind="mergesort")
+        drawn = weights[suspect][:, order] > 0
+        lowest = x[order][np.argmax(drawn, axis=1)]
+        highest = x[order][n - 1 - np.argmax(drawn[:, ::-1], axis=1)]
+        var[suspect[lowest == highest]] = 0.
+
+    return mean, var
+
+
+
+def _batch_weighted_difference(x0, x1, x0_counts, x1_counts,
+                               is_paired, effect_size):
+    """
+    Computes the mean difference, Cohen's d or Hedges' g for every
+    resample at once, where row i of `x0_counts` and `x1_counts` holds the
+    number of times each control and test observation was drawn in the
+    i-th resample.
+
+    Each resample only needs weighted sums and weighted sums of squares,
+    which are taken as matrix products with the resample counts.
+    """
+    import numpy as np
+    from . import effsize as __es
+
+    x0_len = len(x0)
+    x1_len = len(x1)
+
+    x0_weights = x0_counts.astype(np.float64)
+    if is_paired:
+        x1_weights = x0_weights
+    else:
+        x1_weights = x1_counts.astype(np.float64)
+
+    if effect_size == "mean_diff":
         if is_paired:
-            if x0_len != x1_len:
-                raise ValueError("The two arrays do not have the same length.")
-            random_idx = rng.choice(x0_len, x0_len, replace=True)
-            x0_sample = x0[random_idx]
-            x1_sample = x1[random_idx]
+            return (x0_weights @ (x1 - x0)) / x0_len
+        return (x1_weights @ x1) / x1_len - (x0_weights @ x0) / x0_len
+
+    elif effect_size in ("cohens_d", "hedges_g"):
+        x0_mean, x0_var = _weighted_mean_var(x0, x0_weights)
+        x1_mean, x1_var = _weighted_mean_var(x1, x1_weights)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if is_paired:
+                M = (x0_weights @ (x1 - x0)) / x0_len
+                divisor = np.sqrt((x0_var + x1_var) / 2)
+            else:
+                M = x1_mean - x0_mean
+                divisor = np.sqrt(((x0_len - 1) * x0_var +
+                                   (x1_len - 1) * x1_var) /
+                                  (x0_len + x1_len - 2))
+            d = M / divisor
+
+        if effect_size == "cohens_d":
+            return d
+        return __es._compute_hedges_correction_factor(x0_len, x1_len) * d
+
+    else:
+        err = "The effect size '{}' is not a mean-based effect size."
+        raise ValueError(err.format(effect_size))
+
+
+
+def _batch_cliffs_delta(x0, x1, x0_idx, x1_idx):
+    """
+    Computes Cliff's delta for every pair of rows in `x0_idx` and `x1_idx`.
+
+    Each observation is replaced by the position of its value amongst the
+    sorted unique values of both groups. The number of control values
+    lying below (or tied with) each test value can then be read off the
+    cumulative counts of the control codes in each resample.
+    """
+    import numpy as np
+
+    _, codes = np.unique(np.concatenate([x0, x1]), return_inverse=True)
+    n_codes = codes.max() + 1
+    x0_codes = codes[:len(x0)][x0_idx]
+    x1_codes = codes[len(x0):][x1_idx]
+
+    # The resamples need not be as long as the groups, eg. for permutations.
+    x0_len = x0_idx.shape[1]
+    x1_len = x1_idx.shape[1]
+
+    x0_counts = _count_rows(x0_codes, n_codes)
+
+    # Twice the Mann-Whitney U statistic: each control value below a test
+    # value contributes 2, and each tie contributes 1.
+    below_twice = 2 * np.cumsum(x0_counts, axis=1) - x0_counts
+    U_twice = np.take_along_axis(below_twice, x1_codes, axis=1).sum(axis=1)
+
+    return (U_twice / (x0_len * x1_len)) - 1
+
+
+
+def _batch_median(x, idx):
+    """
+    Returns the median of every resample of x, where row i of `idx` holds
+    the indexes of the i-th resample.
+
+    x is sorted once, and each resample is counted in terms of the ranks
+    of its values. The median is then located from the running total of
+    the counts, so the resampled values are never copied or partitioned.
+    """
+    import numpy as np
+
+    rows, n = idx.shape
+
+    order = np.argsort(x, kind="stable")
+    x_sorted = x[order]
+    ranks = np.empty(len(x), dtype=np.intp)
+    ranks[order] = np.arange(len(x))
+
+    # Every row of counts sums to n, so the running total of the counts
+    # over all the rows at once is sorted, and row i begins at a running
+    # total of i*n.
+    cumulative = np.cumsum(_count_rows(ranks[idx], len(x)).ravel())
+    total_starts = np.arange(rows) * n
+    column_starts = np.arange(rows) * len(x)
+
+    lower = np.searchsorted(cumulative, total_starts + (n - 1) // 2,
+                            side="right") - column_starts
+    if n % 2 == 1:
+        return x_sorted[lower]
+
+    upper = np.searchsorted(cumulative, total_starts + n // 2,
+                            side="right") - column_starts
+    return (x_sorted[lower] + x_sorted[upper]) / 2
+
+
+
+def _batch_paired_difference(paired_diffs, idx, effect_size):
+    """
+    Computes the paired mean or median difference for every resample at
+    once, from the differences between the pairs (test minus control).
+    Row i of `idx` holds the indexes of the pairs in the i-th resample.
+    """
+    import numpy as np
+
+    if effect_size == "mean_diff":
+        return np.mean(paired_diffs[idx], axis=1)
+
+    elif effect_size == "median_diff":
+        return _batch_median(paired_diffs, idx)
+
+    else:
+        err = "The effect size '{}' cannot be computed from the paired differences alone."
+        raise ValueError(err.format(effect_size))
+
+
+
+def _batch_sign_flip_difference(x0, x1, swaps, effect_size):
+    """
+    Computes the (unpaired) effect size between the control and test
+    samples of every paired permutation at once. Row i of the boolean
+    array `swaps` marks the pairs whose control and test values are
+    swapped in the i-th permutation.
+
+    Swapping a pair flips the sign of its difference, so the mean
+    difference of every permutation is a single product of the matrix of
+    signs with the differences. The sum of the group means and the sum of
+    squares of all the values are the same in every permutation, so the
+    pooled variance, and hence Cohen's d and Hedges' g, follow from the
+    mean difference. Other effect sizes are computed from the swapped
+    samples; `x0` and `x1` should not contain any NaNs.
+    """
+    import numpy as np
+    from . import effsize as __es
+
+    x0_len = len(x0)
+
+    if effect_size in ("mean_diff", "cohens_d", "hedges_g"):
+        # Centre the values, to keep the sums of squares small.
+        centre = (np.mean(x0) + np.mean(x1)) / 2
+        x0 = x0 - centre
+        x1 = x1 - centre
+
+        signs = np.where(swaps, -1., 1.)
+        M = signs @ (x1 - x0) / x0_len
+        if effect_size == "mean_diff":
+            return M
+
+        sum_sq = np.sum(x0**2) + np.sum(x1**2)
+        mean_sum = np.mean(x0) + np.mean(x1)
+        var_sum = (sum_sq - x0_len * (mean_sum**2 + M**2) / 2) / (x0_len - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d = M / np.sqrt(var_sum / 2)
+
+        if effect_size == "cohens_d":
+            return d
+        return __es._compute_hedges_correction_factor(x0_len, x0_len) * d
+
+    idx = np.arange(x0_len)
+    bag = np.concatenate([x0, x1])
+
+    return _batch_two_group_difference(bag, bag,
+                                       np.where(swaps, idx + x0_len, idx),
+                                       np.where(swaps, idx, idx + x0_len),
+                                       False, effect_size)
+
+
+
+def _batch_two_group_difference(x0, x1, x0_idx, x1_idx,
+                                is_paired, effect_size):
+    """
+    Computes the effect size for every resample at once. Row i of
+    `x0_idx` and `x1_idx` holds the indexes of the i-th control and test
+    resample respectively.
+
+    Mirrors `effsize.two_group_difference`, but operates along the rows
+    of the resamples; `x0` and `x1` should not contain any NaNs.
+    """
+    import numpy as np
+    from . import effsize as __es
+
+    if effect_size == "cliffs_delta":
+        if is_paired is True:
+            err1 = "`is_paired` is True; therefore Cliff's delta is not defined."
+            raise ValueError(err1)
+        return _batch_cliffs_delta(x0, x1, x0_idx, x1_idx)
+
+    if is_paired and effect_size in ("mean_diff", "median_diff"):
+        return _batch_paired_difference(x1 - x0, x0_idx, effect_size)
+
+    if effect_size == "median_diff":
+        return _batch_median(x1, x1_idx) - _batch_median(x0, x0_idx)
+
+    x0_sample = x0[x0_idx]
+    x1_sample = x1[x1_idx]
+
+    if effect_size == "mean_diff":
+        return np.mean(x1_sample, axis=1) - np.mean(x0_sample, axis=1)
+
+    elif effect_size in ("cohens_d", "hedges_g"):
+        x0_len = x0_sample.shape[1]
+        x1_len = x1_sample.shape[1]
+        x0_var = np.var(x0_sample, axis=1, ddof=1)
+        x1_var = np.var(x1_sample, axis=1, ddof=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if is_paired:
+                M = np.mean(x1_sample - x0_sample, axis=1)
+                divisor = np.sqrt((x0_var + x1_var) / 2)
+            else:
+                M = np.mean(x1_sample, axis=1) - np.mean(x0_sample, axis=1)
+                divisor = np.sqrt(((x0_len - 1) * x0_var +
+                                   (x1_len - 1) * x1_var) /
+                                  (x0_len + x1_len - 2))
+            d = M / divisor
+
+        if effect_size == "cohens_d":
+            return d
+        return __es._compute_hedges_correction_factor(x0_len, x1_len) * d
+
+    else:
+        err1 = "The effect size '{}'".format(effect_size)
+        err2 = "is not one of {}".format(["mean_diff", "median_diff",
+                                          "cohens_d", "hedges_g",
+                                          "cliffs_delta"])
+        raise ValueError(" ".join([err1, err2]))
+
+
+
+def _compute_resamples_per_chunk(x0_len, x1_len, memory_limit=None):
+    """
+    Returns the number of bootstrap resamples that can be evaluated at
+    once, such that the resample indexes, the resampled values and the
+    intermediate arrays take up at most roughly `memory_limit` bytes.
+    """
+    if memory_limit is None:
+        memory_limit = DEFAULT_MEMORY_LIMIT
+
+    # Each resample holds an 8-byte index and an 8-byte value for every
+    # observation in both groups, plus as much again in temporaries.
+    bytes_per_resample = 32 * (x0_len + x1_len)
+
+    return max(1, int(memory_limit // bytes_per_resample))
+
+
+
+def _bootstrap_from_stream(draw_indexes, x0, x1, is_paired, effect_sizes,
+                           resamples, memory_limit=None):
+    """
+    Draws `resamples` bootstraps of each of `effect_sizes`, evaluating them
+    in blocks that fit within `memory_limit` bytes. `draw_indexes` is
+    called with the number of resamples in each block, and returns the
+    control and test resample indexes for that block. Every effect size is
+    evaluated over the same resamples.
+
+    Returns a dict mapping each effect size to its bootstraps.
+    """
+    import numpy as np
+    from . import effsize as __es
+
+    x0_len = len(x0)
+    x1_len = len(x1)
+
+    chunk = _compute_resamples_per_chunk(x0_len, x1_len, memory_limit)
+
+    out = {es: np.repeat(np.nan, resamples) for es in effect_sizes}
+
+    # The paired mean and median differences depend only on the
+    # differences between the pairs, so those are taken once and a single
+    # array is resampled.
+    if is_paired:
+        paired_diffs = x1 - x0
+        differenced = [es for es in effect_sizes
+                       if es in ("mean_diff", "median_diff")]
+    else:
+        differenced = []
+
+    # Resample counts (multinomial weights) suffice for the standardized
+    # effect sizes, which avoids copying the data for every resample. For
+    # the mean difference, counting the indexes costs more than gathering
+    # the resampled values, so that is done instead.
+    weighted = [es for es in effect_sizes if es in ("cohens_d", "hedges_g")]
+    gathered = [es for es in effect_sizes
+                if es not in weighted and es not in differenced]
+
+    if "cohens_d" in weighted and "hedges_g" in weighted:
+        # Hedges' g is Cohen's d scaled by a constant.
+        weighted.remove("hedges_g")
+        hedges_factor = __es._compute_hedges_correction_factor(x0_len, x1_len)
+    else:
+        hedges_factor = None
+
+    for start in range(0, resamples, chunk):
+        stop = min(start + chunk, resamples)
+
+        x0_idx, x1_idx = draw_indexes(stop - start)
+
+        for es in differenced:
+            out[es][start:stop] = _batch_paired_difference(paired_diffs,
+                                                           x0_idx, es)
+
+        for es in gathered:
+            out[es][start:stop] = _batch_two_group_difference(x0, x1,
+                                                              x0_idx, x1_idx,
+                                                              is_paired, es)
+
+        if weighted:
+            x0_counts = _count_rows(x0_idx, x0_len)
+            if is_paired:
+                x1_counts = x0_counts
+            else:
+                x1_counts = _count_rows(x1_idx, x1_len)
+            del x0_idx, x1_idx
+
+            for es in weighted:
+                out[es][start:stop] = _batch_weighted_difference(x0, x1,
+                                                        x0_counts, x1_counts,
+                                                        is_paired, es)
+            del x0_counts, x1_counts
+
         else:
-            x0_sample = rng.choice(x0, x0_len, replace=True)
-            x1_sample = rng.choice(x1, x1_len, replace=True)
-            
-        out[i] = __es.two_group_difference(x0_sample, x1_sample,
-                                          is_paired, effect_size)
-    
+            del x0_idx, x1_idx
+
+        if hedges_factor is not None:
+            out["hedges_g"][start:stop] = (hedges_factor *
+                                           out["cohens_d"][start:stop])
+
+    return out
+
+
+
+def _bootstrap_from_seed_sequences(x0, x1, is_paired, effect_sizes,
+                                   seed_sequences, block_sizes,
+                                   memory_limit=None, sampling="ordinary"):
+    """
+    Draws one block of bootstraps per seed sequence, with `block_sizes`
+    resamples each, and returns a dict mapping each of `effect_sizes` to
+    its blocks concatenated in order.
+
+    Balanced and antithetic resamples (see `sampling` in
+    `compute_bootstrapped_diff`) are drawn a whole block at a time, as
+    each resample depends on the others in its block. Balanced blocks
+    take up half of `memory_limit` (see `_check_sampling`), and are
+    evaluated within the other half.
+
+    This is run in each of the worker processes of a parallel bootstrap.
+    """
+    import numpy as np
+    from functools import partial
+    from numpy.random import default_rng
+
+    if sampling == "balanced":
+        if memory_limit is None:
+            memory_limit = DEFAULT_MEMORY_LIMIT
+        memory_limit = memory_limit // 2
+
+    blocks = []
+    for ss, size in zip(seed_sequences, block_sizes):
+        x0_rng, x1_rng = [default_rng(s) for s in ss.spawn(2)]
+        if sampling == "balanced":
+            draw_indexes = _index_slicer(*_draw_balanced_bootstrap_indexes(
+                                x0_rng, x1_rng, len(x0), len(x1), is_paired,
+                                size))
+        elif sampling == "antithetic":
+            draw_indexes = _index_slicer(*_draw_antithetic_bootstrap_indexes(
+                                x0_rng, x1_rng, x0, x1, is_paired, size))
+        else:
+            draw_indexes = partial(_draw_two_group_bootstrap_indexes,
+                                   x0_rng, x1_rng, len(x0), len(x1),
+                                   is_paired)
+        blocks.append(_bootstrap_from_stream(draw_indexes, x0, x1,
+                                             is_paired, effect_sizes, size,
+                                             memory_limit))
+
+    return {es: np.concatenate([b[es] for b in blocks])
+            for es in effect_sizes}
+
+
+
+def _check_sampling(sampling, legacy_rng=False, x0_len=0, x1_len=0,
+                    is_paired=False, memory_limit=None):
+    """
+    Raises a ValueError if `sampling` is not a valid bootstrap sampling
+    scheme, or cannot be drawn with `legacy_rng`, or (for balanced
+    resamples of groups of `x0_len` and `x1_len` observations) if a block
+    of resample indexes would take up more than half of `memory_limit`.
+    """
+    if sampling not in ("ordinary", "balanced", "antithetic"):
+        err = "`sampling` must be one of 'ordinary', 'balanced' or 'antithetic'."
+        raise ValueError(err)
+
+    if legacy_rng and sampling != "ordinary":
+        err = "Only ordinary resamples can be drawn with `legacy_rng`."
+        raise ValueError(err)
+
+    if memory_limit is None:
+        memory_limit = DEFAULT_MEMORY_LIMIT
+
+    if sampling == "balanced" and \
+       2 * _balanced_block_bytes(x0_len, x1_len, is_paired) > memory_limit:
+        err1 = "Balanced resamples are drawn {} at a time,".format(
+                                                        RESAMPLES_PER_STREAM)
+        err2 = "which would take up more than half of `memory_limit` for"
+        err3 = "groups this large. Raise `memory_limit`, or use ordinary"
+        err4 = "or antithetic resamples."
+        raise ValueError(" ".join([err1, err2, err3, err4]))
+
+
+
+def _resolve_n_jobs(n_jobs):
+    """
+    Returns the number of worker processes to use, given `n_jobs` as
+    passed by the user: None means 1, and -1 means all available CPUs.
+    """
+    if n_jobs is None:
+        return 1
+    elif n_jobs == -1:
+        from os import cpu_count
+        return cpu_count()
+    elif n_jobs < 1:
+        raise ValueError("`n_jobs` must be a positive integer, or -1.")
+    return n_jobs
+
+
+
+def _spawn_seed_sequences(seed_sequence, resamples):
+    """
+    Splits `resamples` into blocks of `RESAMPLES_PER_STREAM`, and spawns a
+    child stream of `seed_sequence` for each.
+
+    Children are numbered in the order they are spawned, so spawning the
+    blocks of several successive batches gives the same streams as
+    spawning them all at once.
+
+    Returns the child seed sequences and the number of resamples in each
+    block.
+    """
+    block_sizes = [min(RESAMPLES_PER_STREAM, resamples - start)
+                   for start in range(0, resamples, RESAMPLES_PER_STREAM)]
+
+    return seed_sequence.spawn(len(block_sizes)), block_sizes
+
+
+
+def _worker_memory_limit(memory_limit, n_jobs, block_count):
+    """
+    Returns the `memory_limit` of each of the worker processes that
+    `_map_seed_sequences` spreads `block_count` blocks over, such that
+    together they use at most `memory_limit` bytes.
+    """
+    if memory_limit is None:
+        memory_limit = DEFAULT_MEMORY_LIMIT
+
+    return max(1, int(memory_limit // max(1, min(n_jobs, block_count))))
+
+
+
+def _map_seed_sequences(worker, x0, x1, seed_sequences, block_sizes, n_jobs,
+                        **kwargs):
+    """
+    Calls `worker(x0, x1, seed_sequences=..., block_sizes=..., **kwargs)`
+    on contiguous runs of the blocks, spread over `n_jobs` worker processes.
+    The `memory_limit` in `kwargs`, if any, is shared between the workers.
+
+    Returns the outputs of `worker`, in block order.
+    """
+    import numpy as np
+
+    n_jobs = min(n_jobs, len(block_sizes))
+    if n_jobs <= 1:
+        return [worker(x0, x1, seed_sequences=seed_sequences,
+                       block_sizes=block_sizes, **kwargs)]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # The budget is divided between the workers, which does not change
+    # the resamples drawn.
+    if "memory_limit" in kwargs:
+        kwargs["memory_limit"] = _worker_memory_limit(kwargs["memory_limit"],
+                                                      n_jobs,
+                                                      len(block_sizes))
+
+    # Give each worker a contiguous run of blocks.
+    splits = np.array_split(np.arange(len(block_sizes)), n_jobs)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        futures = [pool.submit(worker, x0, x1,
+                               seed_sequences=[seed_sequences[i]
+                                               for i in split],
+                               block_sizes=[block_sizes[i] for i in split],
+                               **kwargs)
+                   for split in splits]
+        return [f.result() for f in futures]
+
+
+
+def compute_bootstrapped_diff(x0, x1, is_paired, effect_size,
+                              resamples=5000, random_seed=12345,
+                              memory_limit=None, n_jobs=1, legacy_rng=False,
+                              sampling="ordinary"):
+    """
+    Bootstraps the effect_size for 2 groups.
+
+    The resample indexes are drawn as blocks, with one resample per row,
+    and the effect size is evaluated for every resample in a block at
+    once. Each block holds as many resamples as fit in `memory_limit`
+    bytes (256 MB if None); the resamples drawn do not depend on the block
+    size.
+
+    The resamples are split into blocks of `RESAMPLES_PER_STREAM`, each
+    drawn with a `numpy.random.Generator` from its own child stream
+    spawned from `numpy.random.SeedSequence(random_seed)`. The blocks are
+    shared out amongst `n_jobs` worker processes (all available CPUs if
+    -1), which share `memory_limit` between them, and the bootstraps are
+    identical for any value of `n_jobs`.
+
+    If `legacy_rng` is True, all resamples are instead drawn from a single
+    `RandomState(PCG64(random_seed))` stream, exactly as in earlier
+    versions; this cannot be split across worker processes.
+
+    If `effect_size` is a list of effect sizes, they are all evaluated
+    over the same resamples, which are drawn only once, and a dict mapping
+    each effect size to its bootstraps is returned.
+
+    `sampling` selects how the resamples are drawn, to reduce the Monte
+    Carlo variance of the bootstraps for a given number of resamples:
+
+        "ordinary": each resample is drawn independently.
+        "balanced": every observation appears exactly as many times as
+            there are resamples, over all of the resamples.
+        "antithetic": resamples are drawn in pairs, the second of each
+            being the mirror image of the first in terms of the ranks of
+            the observations (paired observations are ranked by their
+            differences).
+
+    Balanced and antithetic resamples are drawn `RESAMPLES_PER_STREAM` at a
+    time, so the index arrays for that many resamples are held at once.
+    Balanced resamples are refused with a ValueError if these would take
+    up more than half of `memory_limit`. Neither can be drawn with
+    `legacy_rng`.
+    """
+    import numpy as np
+    from functools import partial
+    from numpy.random import PCG64, RandomState, SeedSequence
+
+    x0 = np.asarray(x0)
+    x1 = np.asarray(x1)
+    resamples = int(resamples)
+
+    if isinstance(effect_size, str):
+        effect_sizes = [effect_size]
+    else:
+        effect_sizes = list(effect_size)
+
+    n_jobs = _resolve_n_jobs(n_jobs)
+    block_count = -(-resamples // RESAMPLES_PER_STREAM)
+    _check_sampling(sampling, legacy_rng, len(x0), len(x1), is_paired,
+                    _worker_memory_limit(memory_limit, n_jobs, block_count))
+
+    if legacy_rng:
+        if n_jobs > 1:
+            err1 = "`legacy_rng` draws all resamples from a single stream,"
+            err2 = "which cannot be split across worker processes."
+            raise ValueError(" ".join([err1, err2]))
+
+        # rng = RandomState(default_rng(random_seed))
+        rng = RandomState(PCG64(random_seed))
+        draw_indexes = partial(_create_two_group_bootstrap_indexes, rng,
+                               len(x0), len(x1), is_paired)
+        out = _bootstrap_from_stream(draw_indexes, x0, x1,
+                                     is_paired, effect_sizes,
+                                     resamples, memory_limit)
+
+    else:
+        seed_sequences, block_sizes = _spawn_seed_sequences(
+                                        SeedSequence(random_seed), resamples)
+        parts = _map_seed_sequences(_bootstrap_from_seed_sequences, x0, x1,
+                                    seed_sequences, block_sizes, n_jobs,
+                                    is_paired=is_paired,
+                                    effect_sizes=effect_sizes,
+                                    memory_limit=memory_limit,
+                                    sampling=sampling)
+        out = {es: np.concatenate([p[es] for p in parts])
+               for es in effect_sizes}
+
     # check whether there are any infinities in the bootstrap,
     # which likely indicates the sample sizes are too small as
     # the computation of Cohen's d and Hedges' g necessitated 
@@ -175,7 +1209,554 @@ def compute_bootstrapped_diff(x0, x1, is_paired, effect_size,
     #     "The computation of Cohen's d and Hedges' g will therefore "\
     #     "involved a division by zero. "
     #     warnings.warn(warn_msg.format(num_infinities), category="UserWarning")
-        
+
+    if isinstance(effect_size, str):
+        return out[effect_size]
+    return out
+
+
+
+
+def compute_adaptive_bootstrapped_diff(x0, x1, is_paired, effect_size,
+                                       effsize, acceleration, mc_tolerance,
+                                       ci=95, max_resamples=100000,
+                                       random_seed=12345, memory_limit=None,
+                                       n_jobs=1, sampling="ordinary"):
+    """
+    Bootstraps the effect_size for 2 groups in rounds of
+    `ADAPTIVE_BATCH_RESAMPLES` resamples, until the Monte Carlo standard
+    errors of both BCa interval limits (at every width in `ci`) are at
+    most `mc_tolerance` and neither limit is amongst the 10 most extreme
+    bootstraps, or until `max_resamples` resamples have been drawn.
+
+    The standard errors are estimated with
+    `compute_interval_limit_mc_se`, from the bias correction for
+    `effsize` and the `acceleration` of the BCa interval.
+
+    The resamples are drawn from the same streams as in
+    `compute_bootstrapped_diff`, so the bootstraps returned are identical
+    to those from `compute_bootstrapped_diff` with as many resamples (and
+    the same `sampling`).
+    """
+    import numpy as np
+    from numpy.random import SeedSequence
+
+    x0 = np.asarray(x0)
+    x1 = np.asarray(x1)
+    max_resamples = int(max_resamples)
+    ci_levels = list(np.atleast_1d(ci))
+    n_jobs = _resolve_n_jobs(n_jobs)
+    block_count = -(-min(ADAPTIVE_BATCH_RESAMPLES, max_resamples) //
+                    RESAMPLES_PER_STREAM)
+    _check_sampling(sampling, False, len(x0), len(x1), is_paired,
+                    _worker_memory_limit(memory_limit, n_jobs, block_count))
+
+    if mc_tolerance <= 0:
+        raise ValueError("`mc_tolerance` must be positive.")
+
+    root = SeedSequence(random_seed)
+    blocks = []
+    drawn = 0
+
+    while drawn < max_resamples:
+        size = min(ADAPTIVE_BATCH_RESAMPLES, max_resamples - drawn)
+        seed_sequences, block_sizes = _spawn_seed_sequences(root, size)
+        parts = _map_seed_sequences(_bootstrap_from_seed_sequences, x0, x1,
+                                    seed_sequences, block_sizes, n_jobs,
+                                    is_paired=is_paired,
+                                    effect_sizes=[effect_size],
+                                    memory_limit=memory_limit,
+                                    sampling=sampling)
+        blocks.extend([p[effect_size] for p in parts])
+        drawn += size
+
+        bootstraps = np.concatenate(blocks)
+        sorted_bootstraps = np.sort(bootstraps)
+
+        bias = compute_meandiff_bias_correction(bootstraps, effsize)
+        low, high = compute_interval_limits(bias, acceleration, drawn,
+                                            ci_levels)
+        limits = [i for i in low + high if not np.isnan(i)]
+        mc_se = [compute_interval_limit_mc_se(sorted_bootstraps, i)
+                 for i in limits]
+
+        # Limits amongst the 10 most extreme bootstraps are unstable,
+        # whatever their estimated error. An undefined limit (NaN) will not
+        # become defined with more resamples, so it is not waited on.
+        unstable = any(i <= 10 or i >= drawn - 9 for i in limits)
+        if not unstable and not np.any(np.array(mc_se) > mc_tolerance):
+            break
+
+    return bootstraps
+
+
+
+def _batch_analytic_se(x0, x1, x0_idx, x1_idx, is_paired, effect_size,
+                       estimates):
+    """
+    Returns the standard error of the effect size for every resample, from
+    its closed-form (large-sample) expression, given the resample indexes
+    and the effect size `estimates` of each resample.
+
+    Returns None if there is no closed form for `effect_size`; this is the
+    case for the median difference, Cliff's delta, and the paired
+    standardized effect sizes.
+    """
+    import numpy as np
+    from . import effsize as __es
+
+    x0_len = x0_idx.shape[1]
+    x1_len = x1_idx.shape[1]
+
+    if effect_size == "mean_diff":
+        if is_paired:
+            diffs = (x1 - x0)[x0_idx]
+            return np.std(diffs, axis=1, ddof=1) / np.sqrt(x0_len)
+
+        x0_var = np.var(x0[x0_idx], axis=1, ddof=1)
+        x1_var = np.var(x1[x1_idx], axis=1, ddof=1)
+        return np.sqrt(x0_var / x0_len + x1_var / x1_len)
+
+    if effect_size in ("cohens_d", "hedges_g") and not is_paired:
+        if effect_size == "hedges_g":
+            factor = __es._compute_hedges_correction_factor(x0_len, x1_len)
+        else:
+            factor = 1.
+        d = np.asarray(estimates) / factor
+        n = x0_len + x1_len
+        return factor * np.sqrt(n / (x0_len * x1_len) + d**2 / (2 * n))
+
+    return None
+
+
+
+def _batch_inner_bootstrap_se(x0, x1, x0_idx, x1_idx, is_paired, effect_size,
+                              x0_rng, x1_rng, inner_resamples):
+    """
+    Returns the standard error of the effect size for every resample,
+    estimated by bootstrapping each resample `inner_resamples` times.
+
+    The inner resamples of all the resamples are drawn as one block, and
+    evaluated with `_batch_two_group_difference` in a single call.
+    """
+    import numpy as np
+
+    resamples, x0_len = x0_idx.shape
+    x1_len = x1_idx.shape[1]
+    rows = np.arange(resamples)[:, None, None]
+
+    x0_pos = x0_rng.integers(0, x0_len,
+                             size=(resamples, inner_resamples, x0_len))
+    x0_inner = x0_idx[rows, x0_pos].reshape(-1, x0_len)
+    if is_paired:
+        x1_inner = x0_inner
+    else:
+        x1_pos = x1_rng.integers(0, x1_len,
+                                 size=(resamples, inner_resamples, x1_len))
+        x1_inner = x1_idx[rows, x1_pos].reshape(-1, x1_len)
+
+    inner = _batch_two_group_difference(x0, x1, x0_inner, x1_inner,
+                                        is_paired, effect_size)
+    inner = inner.reshape(resamples, inner_resamples)
+
+    return np.std(inner, axis=1, ddof=1)
+
+
+
+def _studentized_from_seed_sequences(x0, x1, is_paired, effect_size,
+                                     seed_sequences, block_sizes,
+                                     inner_resamples, memory_limit=None):
+    """
+    Draws one block of bootstraps per seed sequence, with `block_sizes`
+    resamples each, along with the standard error of each bootstrap.
+
+    The outer resamples are drawn from the same streams as in
+    `_bootstrap_from_seed_sequences`; the inner resamples (if any are
+    needed) are drawn from two further child streams of each block.
+
+    Returns the bootstraps and their standard errors.
+    """
+    import numpy as np
+    from numpy.random import default_rng
+
+    x0_len = len(x0)
+    x1_len = len(x1)
+
+    # Only the outer resamples are held at once if the standard errors
+    # have a closed form; otherwise, the inner resamples of each are too.
+    analytic = _batch_analytic_se(x0, x1, np.arange(x0_len)[None, :],
+                                  np.arange(x1_len)[None, :], is_paired,
+                                  effect_size, [0.]) is not None
+    chunk = _compute_resamples_per_chunk(x0_len, x1_len, memory_limit)
+    if not analytic:
+        chunk = max(1, chunk // inner_resamples)
+
+    bootstraps, ses = [], []
+    for ss, size in zip(seed_sequences, block_sizes):
+        x0_rng, x1_rng, x0_inner_rng, x1_inner_rng = [default_rng(s)
+                                                      for s in ss.spawn(4)]
+        for start in range(0, size, chunk):
+            x0_idx, x1_idx = _draw_two_group_bootstrap_indexes(x0_rng, x1_rng,
+                                x0_len, x1_len, is_paired,
+                                min(chunk, size - start))
+
+            boots = _batch_two_group_difference(x0, x1, x0_idx, x1_idx,
+                                                is_paired, effect_size)
+            if analytic:
+                se = _batch_analytic_se(x0, x1, x0_idx, x1_idx, is_paired,
+                                        effect_size, boots)
+            else:
+                se = _batch_inner_bootstrap_se(x0, x1, x0_idx, x1_idx,
+                                               is_paired, effect_size,
+                                               x0_inner_rng, x1_inner_rng,
+                                               inner_resamples)
+            bootstraps.append(boots)
+            ses.append(se)
+
+    return np.concatenate(bootstraps), np.concatenate(ses)
+
+
+
+def compute_studentized_bootstraps(x0, x1, is_paired, effect_size,
+                                   resamples=5000, random_seed=12345,
+                                   memory_limit=None, n_jobs=1,
+                                   inner_resamples=50):
+    """
+    Bootstraps the effect_size for 2 groups, along with the standard error
+    of each bootstrap, for bootstrap-t (studentized) confidence intervals.
+
+    The bootstraps are drawn from the same resamples as those from
+    `compute_bootstrapped_diff` with the same `random_seed`.
+
+    The standard errors are computed from their closed forms for the mean
+    difference, and for the unpaired Cohen's d and Hedges' g. For the
+    other effect sizes, each resample is itself bootstrapped
+    `inner_resamples` times; the inner resamples are drawn and evaluated
+    in blocks (within `memory_limit` bytes), as the outer ones are.
+
+    Returns
+    -------
+    bootstraps: numpy ndarray
+        The bootstraps of the effect size.
+    bootstrap_ses: numpy ndarray
+        The standard error of each bootstrap.
+    se: float
+        The standard error of the effect size of the original samples. If
+        there is no closed form for it, this is the standard deviation of
+        the bootstraps.
+    """
+    import numpy as np
+    from numpy.random import SeedSequence
+
+    x0 = np.asarray(x0)
+    x1 = np.asarray(x1)
+    resamples = int(resamples)
+
+    if effect_size == "cliffs_delta" and is_paired is True:
+        err1 = "`is_paired` is True; therefore Cliff's delta is not defined."
+        raise ValueError(err1)
+    if inner_resamples < 2:
+        raise ValueError("`inner_resamples` must be at least 2.")
+
+    seed_sequences, block_sizes = _spawn_seed_sequences(
+                                    SeedSequence(random_seed), resamples)
+    parts = _map_seed_sequences(_studentized_from_seed_sequences, x0, x1,
+                                seed_sequences, block_sizes,
+                                _resolve_n_jobs(n_jobs),
+                                is_paired=is_paired, effect_size=effect_size,
+                                inner_resamples=inner_resamples,
+                                memory_limit=memory_limit)
+    bootstraps = np.concatenate([p[0] for p in parts])
+    bootstrap_ses = np.concatenate([p[1] for p in parts])
+
+    x0_idx = np.arange(len(x0))[None, :]
+    x1_idx = np.arange(len(x1))[None, :]
+    estimate = _batch_two_group_difference(x0, x1, x0_idx, x1_idx,
+                                           is_paired, effect_size)
+    se = _batch_analytic_se(x0, x1, x0_idx, x1_idx, is_paired, effect_size,
+                            estimate)
+    if se is None:
+        # Leave out the bootstraps that are not defined (eg. those of a
+        # standardized effect size of a resample with no spread).
+        se = np.std(bootstraps[np.isfinite(bootstraps)], ddof=1)
+    else:
+        se = se[0]
+
+    return bootstraps, bootstrap_ses, se
+
+
+
+def compute_studentized_interval(bootstraps, bootstrap_ses, effsize, se,
+                                 ci=95):
+    """
+    Returns the bootstrap-t (studentized) confidence interval limits.
+
+    Keywords
+    --------
+    bootstraps, bootstrap_ses: array-like
+        The bootstraps of the effect size, and the standard error of each.
+    effsize: numeric
+        The effect size for the original sample.
+    se: numeric
+        The standard error of the effect size for the original sample.
+    ci: numeric, or sequence of numerics, default 95
+        The confidence interval width, in percent.
+
+    Returns
+    -------
+    low, high: floats
+        The lower and upper limits of the interval; if `ci` is a sequence,
+        lists of the limits at each width.
+    """
+    import numpy as np
+    import warnings
+
+    bootstraps = np.asarray(bootstraps)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_stats = (bootstraps - effsize) / np.asarray(bootstrap_ses)
+
+    # A resample with a standard error of zero or NaN (eg. one in which
+    # the values of a group are all equal) has no t-statistic. These are
+    # left out, rather than sorted to the ends and taken as quantiles.
+    finite = np.isfinite(t_stats)
+    num_undefined = len(t_stats) - np.count_nonzero(finite)
+    if num_undefined > 0:
+        warn_msg = "There are {} bootstrap(s) whose t-statistic is not "\
+        "defined, as their standard error is zero or not defined. "\
+        "This is likely due to small sample sizes, or to many tied "\
+        "values. They are left out of the studentized interval."
+        warnings.warn(warn_msg.format(num_undefined), category=UserWarning)
+
+    t_stats = np.sort(t_stats[finite])
+    n_boots = len(t_stats)
+    if n_boots == 0:
+        nans = [np.nan] * len(np.atleast_1d(ci))
+        if np.ndim(ci) == 0:
+            return nans[0], nans[0]
+        return nans, list(nans)
+
+    alphas = np.atleast_1d(_compute_alpha_from_ci(ci))
+    low, high = [], []
+    for alpha in alphas:
+        t_low = t_stats[int((alpha / 2) * n_boots)]
+        t_high = t_stats[int((1 - alpha / 2) * n_boots)]
+        low.append(effsize - t_high * se)
+        high.append(effsize - t_low * se)
+
+    if np.ndim(ci) == 0:
+        return low[0], high[0]
+    return low, high
+
+
+
+def _iter_chunks(x, chunk_len, drop_nan=True):
+    """
+    Yields 1-D float arrays of data from `x`, with NaNs dropped unless
+    `drop_nan` is False. A NumPy array is split into chunks of `chunk_len`
+    observations; any other iterable is taken to already yield the chunks.
+    """
+    import numpy as np
+
+    if isinstance(x, np.ndarray):
+        chunks = (x[start:start + chunk_len]
+                  for start in range(0, len(x), chunk_len))
+    else:
+        chunks = x
+
+    for chunk in chunks:
+        chunk = np.atleast_1d(np.asarray(chunk, dtype=np.float64))
+        if drop_nan:
+            chunk = chunk[~np.isnan(chunk)]
+        yield chunk
+
+
+
+def _poisson_update(totals, chunk, weights):
+    """
+    Adds a chunk of data to the running total weights, weighted means and
+    weighted sums of squared deviations of every resample in `totals`,
+    where `weights` holds the weight of each observation (one per row) in
+    each resample (one per column). The per-chunk sums are merged with the
+    pairwise update of Chan, Golub and LeVeque (1979), which stays accurate
+    when the data is far from zero.
+    """
+    import numpy as np
+
+    total_weight, mean, sq_dev = totals
+
+    # Centre the chunk so the sums of squares do not lose precision.
+    shift = np.mean(chunk)
+    centred = chunk - shift
+
+    chunk_weight = weights.sum(axis=0)
+    sums = centred @ weights
+    chunk_mean = np.divide(sums, chunk_weight,
+                           out=np.zeros_like(sums), where=chunk_weight > 0)
+    chunk_sq_dev = (centred ** 2) @ weights - sums * chunk_mean
+    chunk_mean += shift
+
+    new_weight = total_weight + chunk_weight
+    frac = np.divide(chunk_weight, new_weight,
+                     out=np.zeros_like(sums), where=new_weight > 0)
+    delta = chunk_mean - mean
+
+    mean = mean + delta * frac
+    sq_dev = sq_dev + chunk_sq_dev + (delta ** 2) * total_weight * frac
+
+    return new_weight, mean, sq_dev
+
+
+
+def compute_poisson_bootstrapped_diff(x0, x1, is_paired, effect_size,
+                                      resamples=5000, random_seed=12345,
+                                      memory_limit=None):
+    """
+    Bootstraps a mean-based effect size for 2 groups in a single
+    sequential pass over the data, using Poisson(1) resample weights.
+
+    Instead of drawing n observations with replacement, every observation
+    is given an independent Poisson(1) weight in each resample, which is
+    the number of times it appears in that resample. The weighted count,
+    mean and sum of squared deviations of each resample are then updated
+    one chunk of observations at a time, so neither group has to be held
+    in memory at once. The resample sizes vary around n, which makes
+    little difference to the bootstraps unless the groups are small.
+
+    Keywords
+    --------
+    x0, x1: array-like, or iterable of array-like
+        The control and test groups. Each is either a NumPy array, or an
+        iterable (eg. a generator reading from disk) yielding 1-D chunks of
+        the group. NaNs are dropped.
+
+    is_paired: boolean
+        If True, the chunks of `x0` and `x1` must be the same lengths, and
+        each pair of observations shares the same weights. Pairs in which
+        either value is NaN are dropped.
+
+    effect_size: string, or list of strings
+        'mean_diff', 'cohens_d' or 'hedges_g'. If a list is given, a dict
+        mapping each effect size to its bootstraps is returned.
+
+    resamples: int, default 5000
+
+    random_seed: int, default 12345
+        The weights are drawn with `numpy.random.Generator`s spawned from
+        `numpy.random.SeedSequence(random_seed)`, one observation at a
+        time, so the bootstraps do not depend on how the groups are
+        chunked.
+
+    memory_limit: int, default None
+        The approximate maximum number of bytes used to hold the weights
+        of a chunk. NumPy arrays are split into chunks that fit within it;
+        other iterables are used as they are chunked. If None, up to
+        256 MB is used.
+
+    Returns
+    -------
+    bootstraps: numpy ndarray
+        The bootstraps of the effect size, in the order drawn.
+    """
+    import numpy as np
+    from itertools import zip_longest
+    from numpy.random import SeedSequence, default_rng
+    from . import effsize as __es
+
+    if isinstance(effect_size, str):
+        effect_sizes = [effect_size]
+    else:
+        effect_sizes = list(effect_size)
+
+    for es in effect_sizes:
+        if es not in ("mean_diff", "cohens_d", "hedges_g"):
+            err1 = "The effect size '{}' cannot be bootstrapped".format(es)
+            err2 = "with Poisson weights; only 'mean_diff', 'cohens_d' and"
+            err3 = "'hedges_g' are supported."
+            raise ValueError(" ".join([err1, err2, err3]))
+
+    resamples = int(resamples)
+    if memory_limit is None:
+        memory_limit = DEFAULT_MEMORY_LIMIT
+
+    # Each observation holds an 8-byte weight for every resample, plus
+    # as much again in temporaries.
+    chunk_len = max(1, int(memory_limit // (16 * resamples)))
+
+    x0_rng, x1_rng = [default_rng(s) for s in
+                      SeedSequence(random_seed).spawn(2)]
+
+    def draw_weights(rng, n):
+        # Drawn with one row per observation, so the weights do not depend
+        # on where the chunks begin and end.
+        return rng.poisson(1.0, size=(n, resamples)).astype(np.float64)
+
+    empty = (np.zeros(resamples), np.zeros(resamples), np.zeros(resamples))
+    x0_totals = x1_totals = empty
+    x0_len = x1_len = 0
+
+    if is_paired:
+        # A group with more chunks than the other would otherwise be cut
+        # off silently.
+        for x0_chunk, x1_chunk in zip_longest(
+                                    _iter_chunks(x0, chunk_len, False),
+                                    _iter_chunks(x1, chunk_len, False)):
+            if x0_chunk is None or x1_chunk is None or \
+               len(x0_chunk) != len(x1_chunk):
+                err = "The chunks of the two groups are not the same length."
+                raise ValueError(err)
+            # Drop the pairs in which either value is NaN.
+            good_indexes = ~(np.isnan(x0_chunk) | np.isnan(x1_chunk))
+            x0_chunk = x0_chunk[good_indexes]
+            x1_chunk = x1_chunk[good_indexes]
+            weights = draw_weights(x0_rng, len(x0_chunk))
+            x0_totals = _poisson_update(x0_totals, x0_chunk, weights)
+            x1_totals = _poisson_update(x1_totals, x1_chunk, weights)
+            x0_len += len(x0_chunk)
+        x1_len = x0_len
+
+    else:
+        for x0_chunk in _iter_chunks(x0, chunk_len):
+            weights = draw_weights(x0_rng, len(x0_chunk))
+            x0_totals = _poisson_update(x0_totals, x0_chunk, weights)
+            x0_len += len(x0_chunk)
+
+        for x1_chunk in _iter_chunks(x1, chunk_len):
+            weights = draw_weights(x1_rng, len(x1_chunk))
+            x1_totals = _poisson_update(x1_totals, x1_chunk, weights)
+            x1_len += len(x1_chunk)
+
+    x0_weight, x0_mean, x0_sq_dev = x0_totals
+    x1_weight, x1_mean, x1_sq_dev = x1_totals
+
+    out = {}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # A resample in which a group has a total weight of zero has no
+        # mean, and one with a total weight of one has no variance.
+        x0_mean[x0_weight == 0] = np.nan
+        x1_mean[x1_weight == 0] = np.nan
+
+        M = x1_mean - x0_mean
+        if "mean_diff" in effect_sizes:
+            out["mean_diff"] = M
+
+        if "cohens_d" in effect_sizes or "hedges_g" in effect_sizes:
+            if is_paired:
+                divisor = np.sqrt((x0_sq_dev / (x0_weight - 1) +
+                                   x1_sq_dev / (x1_weight - 1)) / 2)
+            else:
+                divisor = np.sqrt((x0_sq_dev + x1_sq_dev) /
+                                  (x0_weight + x1_weight - 2))
+            d = M / divisor
+
+            if "cohens_d" in effect_sizes:
+                out["cohens_d"] = d
+            if "hedges_g" in effect_sizes:
+                out["hedges_g"] = d * __es._compute_hedges_correction_factor(
+                                                            x0_len, x1_len)
+
+    if isinstance(effect_size, str):
+        return out[effect_size]
     return out
 
 
@@ -204,20 +1785,108 @@ def compute_meandiff_bias_correction(bootstraps, effsize):
 
     """
     from scipy.stats import norm
-    from numpy import array
+    from numpy import array, count_nonzero
 
     B = array(bootstraps)
-    prop_less_than_es = sum(B < effsize) / len(B)
+    prop_less_than_es = count_nonzero(B < effsize) / len(B)
 
     return norm.ppf(prop_less_than_es)
 
 
 
+def partition_at_interval_limits(bootstraps, limit_indexes):
+    """
+    Returns a copy of the bootstraps in which the value at each of the
+    interval limit indexes is the one that would be there if the
+    bootstraps were sorted.
+
+    The values are found by selection (`numpy.partition`), which takes
+    O(n) time for each limit rather than the O(n log n) of a full sort.
+    NaN indexes (eg. from an undefined BCa interval) are ignored.
+    """
+    import numpy as np
+
+    kth = sorted(set(int(i) for i in limit_indexes if not np.isnan(i)))
+
+    if len(kth) == 0:
+        return np.array(bootstraps)
+    return np.partition(bootstraps, kth)
+
+
+
+def _interval_limit_mc_se_ranks(limit_index, n_boots):
+    """
+    Returns m, the standard deviation (in ranks) of the rank of the
+    interval limit at `limit_index` amongst `n_boots` bootstraps, along
+    with the indexes of the order statistics m ranks below and above it
+    (within the bootstraps).
+    """
+    import numpy as np
+
+    limit_index = int(limit_index)
+    p = limit_index / n_boots
+    m = max(1, int(np.ceil(np.sqrt(n_boots * p * (1 - p)))))
+
+    return m, max(limit_index - m, 0), min(limit_index + m, n_boots - 1)
+
+
+
+def interval_limit_mc_se_indexes(limit_indexes, n_boots):
+    """
+    Returns the indexes of the order statistics that
+    `compute_interval_limit_mc_se` needs, besides the limits themselves,
+    for each of `limit_indexes`; NaN indexes are skipped.
+    """
+    import numpy as np
+
+    out = []
+    for i in limit_indexes:
+        if not np.isnan(i):
+            out.extend(_interval_limit_mc_se_ranks(i, n_boots)[1:])
+    return out
+
+
+
+def compute_interval_limit_mc_se(sorted_bootstraps, limit_index):
+    """
+    Estimates the Monte Carlo standard error of the interval limit at
+    `limit_index` of the sorted bootstraps, ie. its standard deviation
+    over repeated bootstraps with different random seeds.
+
+    The rank of the limit amongst the bootstraps of the population has a
+    binomial distribution, with a standard deviation of
+    m = sqrt(B * p * (1 - p)) ranks for B bootstraps and p = limit_index / B.
+    This is converted to the scale of the effect size with the spacing of
+    the order statistics m ranks either side of the limit.
+
+    Only the values m ranks either side of `limit_index` need to be in
+    sorted position (see `interval_limit_mc_se_indexes` and
+    `partition_at_interval_limits`). Returns NaN if `limit_index` is NaN.
+    """
+    import numpy as np
+
+    if np.isnan(limit_index):
+        return np.nan
+
+    m, lo, hi = _interval_limit_mc_se_ranks(limit_index,
+                                            len(sorted_bootstraps))
+    if hi == lo:
+        return 0.
+
+    return m * (sorted_bootstraps[hi] - sorted_bootstraps[lo]) / (hi - lo)
+
+
+
 def _compute_alpha_from_ci(ci):
-    if ci < 0 or ci > 100:
+    import numpy as np
+
+    ci_array = np.asarray(ci, dtype=float)
+    if np.any(ci_array < 0) or np.any(ci_array > 100):
         raise ValueError("`ci` must be a number between 0 and 100.")
 
-    return (100. - ci) / 100.
+    if ci_array.ndim == 0:
+        return (100. - ci) / 100.
+    return (100. - ci_array) / 100.
 
 
 
@@ -234,9 +1903,13 @@ def compute_interval_limits(bias, acceleration, n_boots, ci=95):
     Returns the indexes of the interval limits for a given bootstrap.
 
     Supply the bias, acceleration factor, and number of bootstraps.
+
+    If `ci` is a sequence of interval widths, the limits for all of them
+    are computed at once, and lists of the lower and upper limit indexes
+    (one per width) are returned.
     """
     from scipy.stats import norm
-    from numpy import isnan, nan
+    from numpy import isnan, nan, ndim, where
 
     alpha = _compute_alpha_from_ci(ci)
 
@@ -250,6 +1923,14 @@ def compute_interval_limits(bias, acceleration, n_boots, ci=95):
     low = _compute_quantile(z_low, **kws)
     high = _compute_quantile(z_high, **kws)
 
+    if ndim(ci) > 0:
+        limits = []
+        for q in (low, high):
+            idx = (norm.cdf(where(isnan(q), 0, q)) * n_boots).astype(int)
+            limits.append([nan if isnan(q_) else int(i)
+                           for q_, i in zip(q, idx)])
+        return limits[0], limits[1]
+
     if isnan(low) or isnan(high):
         return low, high
 
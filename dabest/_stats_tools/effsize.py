@@ -125,14 +125,8 @@ def func_difference(control, test, func, is_paired):
             err = "The two arrays supplied do not have the same length."
             raise ValueError(err)
 
-        control_nan = np.where(np.isnan(control))[0]
-        test_nan    = np.where(np.isnan(test))[0]
-
-        indexes_to_drop = np.unique(np.concatenate([control_nan,
-                                                    test_nan]))
-
-        good_indexes = [i for i in range(0, len(control))
-                        if i not in indexes_to_drop]
+        # Drop the pairs in which either value is NaN.
+        good_indexes = ~(np.isnan(control) | np.isnan(test))
 
         control = control[good_indexes]
         test    = test[good_indexes]
@@ -460,7 +460,7 @@ def EffectSizeDataFramePlotter(EffectSizeDataFrame, **plot_kwargs):
     halfviolin_alpha = plot_kwargs["halfviolin_alpha"]
 
 
-    results      = EffectSizeDataFrame.results
+    results      = EffectSizeDataFrame._plot_results
     contrast_xtick_labels = []
 
     for j, tick in enumerate(ticks_to_plot):
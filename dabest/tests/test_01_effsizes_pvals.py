@@ -93,6 +93,15 @@ def test_median_diff_paired():
 
 
 
+def test_paired_difference_drops_nan_pairs():
+    from numpy import mean as npmean
+    pre = np.array([1., np.nan, 3., 4., 5.])
+    post = np.array([2., 4., np.nan, 6., 8.])
+    mean_diff = effsize.func_difference(pre, post, npmean, is_paired=True)
+    assert mean_diff == pytest.approx(2.)
+
+
+
 def test_cohens_d_unpaired():
     import numpy as np
     cohens_d = effsize.cohens_d(wellbeing.control, wellbeing.expt,
@@ -188,7 +197,8 @@ def test_ordinal_dominance():
 def test_unpaired_permutation_test():
     perm_test = PermutationTest(wellbeing.control, wellbeing.expt, 
                                 effect_size="mean_diff", 
-                                is_paired=False)
+                                is_paired=False,
+                                legacy_rng=True)
     assert perm_test.pvalue == pytest.approx(0.2976)
     
     
@@ -197,11 +207,215 @@ def test_paired_permutation_test():
     perm_test = PermutationTest(paired_wellbeing.pre, 
                                 paired_wellbeing.post, 
                                 effect_size="mean_diff", 
-                                is_paired=True)
+                                is_paired=True,
+                                legacy_rng=True)
     assert perm_test.pvalue == pytest.approx(0.0124)
     
     
     
+def test_permutation_test_generator():
+    for c, t, paired in [(wellbeing.control, wellbeing.expt, False),
+                         (paired_wellbeing.pre, paired_wellbeing.post, True)]:
+        perm_test = PermutationTest(c, t, effect_size="mean_diff",
+                                    is_paired=paired, random_seed=12345)
+        legacy = PermutationTest(c, t, effect_size="mean_diff",
+                                 is_paired=paired, random_seed=12345,
+                                 legacy_rng=True)
+        repeat = PermutationTest(c, t, effect_size="mean_diff",
+                                 is_paired=paired, random_seed=12345)
+
+        assert perm_test.pvalue == repeat.pvalue
+        # The 10 pairs have only 1024 patterns of swaps, which are
+        # enumerated rather than drawn.
+        assert perm_test.exact is paired
+        assert len(perm_test.permutations) == (1024 if paired else 5000)
+        # Both generators draw from the same null distribution.
+        assert perm_test.pvalue == pytest.approx(legacy.pvalue, abs=0.02)
+
+
+
+@pytest.mark.parametrize("effect_size", ["mean_diff", "median_diff",
+                                         "cohens_d", "hedges_g",
+                                         "cliffs_delta"])
+def test_batched_permutations_match_single_permutations(effect_size):
+    control = np.array(likert_control, dtype=float)
+    test    = np.array(likert_treatment, dtype=float)
+    perm_test = PermutationTest(control, test, effect_size=effect_size,
+                                is_paired=False, permutation_count=1000)
+
+    # Reshuffle one permutation at a time, as the batched test does.
+    rng = np.random.default_rng(12345)
+    bag = np.concatenate([control, test])
+    shuffled = rng.permuted(np.tile(bag, (1000, 1)), axis=1)
+    expected = [effsize.two_group_difference(s[:len(control)],
+                                             s[len(control):],
+                                             False, effect_size)
+                for s in shuffled]
+
+    assert perm_test.permutations == pytest.approx(expected)
+    threshold = abs(effsize.two_group_difference(control, test, False,
+                                                 effect_size))
+    assert perm_test.pvalue == np.mean(np.abs(expected) > threshold)
+
+
+
+@pytest.mark.parametrize("effect_size", ["mean_diff", "median_diff",
+                                         "cohens_d", "hedges_g"])
+def test_sign_flip_permutations_match_swapped_pairs(effect_size):
+    control = np.array(paired_wellbeing.pre, dtype=float)
+    test    = np.array(paired_wellbeing.post, dtype=float)
+    perm_test = PermutationTest(control, test, effect_size=effect_size,
+                                is_paired=True, permutation_count=1000)
+
+    # Swap each pair with a probability of one half.
+    rng = np.random.default_rng(12345)
+    swaps = rng.random((1000, len(control))) < 0.5
+    expected = [effsize.two_group_difference(np.where(s, test, control),
+                                             np.where(s, control, test),
+                                             False, effect_size)
+                for s in swaps]
+
+    assert perm_test.permutations == pytest.approx(expected)
+
+
+
+def test_exact_permutation_test():
+    from itertools import combinations
+
+    control = np.array(likert_control[:6], dtype=float)
+    test    = np.array(likert_treatment, dtype=float)
+    perm_test = PermutationTest(control, test, effect_size="mean_diff",
+                                is_paired=False)
+
+    assert perm_test.exact
+    assert perm_test.permutation_count == 924
+    assert perm_test.pvalue_mc_se == 0
+
+    bag = np.concatenate([control, test])
+    threshold = abs(test.mean() - control.mean())
+    extreme = 0
+    for split in combinations(range(12), 6):
+        in_control = np.isin(np.arange(12), split)
+        extreme += abs(bag[~in_control].mean() - bag[in_control].mean()) \
+                   >= threshold - 1e-9
+    assert perm_test.pvalue == pytest.approx(extreme / 924)
+
+    # The observed labeling and its mirror image are as extreme as the
+    # observed effect size, however well separated the groups are.
+    separated = PermutationTest(np.arange(1., 7.), np.arange(7., 13.),
+                                effect_size="mean_diff", is_paired=False)
+    assert separated.exact
+    assert separated.pvalue == pytest.approx(2 / 924)
+
+    # Ties of the observed effect size count as at least as extreme.
+    tied = PermutationTest([1., 2., 2., 3., 3., 3.], [2., 3., 3., 4., 4., 5.],
+                           effect_size="median_diff", is_paired=False)
+    assert tied.pvalue == pytest.approx(34 / 231)
+
+    # With fewer permutations than relabelings, they are drawn at random.
+    assert not PermutationTest(control, test, effect_size="mean_diff",
+                               is_paired=False, permutation_count=900).exact
+    assert PermutationTest(control, test, effect_size="mean_diff",
+                           is_paired=False, permutation_count=924).exact
+    assert not PermutationTest(control, test, effect_size="mean_diff",
+                               is_paired=False, permutation_count=923).exact
+    for count, exact in [(1024, True), (1023, False)]:
+        assert PermutationTest(paired_wellbeing.pre, paired_wellbeing.post,
+                               effect_size="mean_diff", is_paired=True,
+                               permutation_count=count).exact is exact
+
+
+
+@pytest.mark.parametrize("paired", [False, True])
+def test_sequential_permutation_test(paired):
+    if paired:
+        # Larger than `paired_wellbeing`, which is tested exactly.
+        rng = np.random.default_rng(7)
+        control = rng.normal(size=30)
+        test    = control + rng.normal(loc=0.2, size=30)
+    else:
+        control, test = wellbeing.control, wellbeing.expt
+    kwargs = dict(effect_size="mean_diff", is_paired=paired,
+                  permutation_count=100000)
+
+    full = PermutationTest(control, test, **kwargs)
+    sequential = PermutationTest(control, test, stop_after=10, **kwargs)
+
+    assert sequential.stopped_early
+    count = sequential.permutation_count
+    assert count < 100000
+    # The same permutations are drawn, up to the 10th more extreme one.
+    assert np.array_equal(sequential.permutations, full.permutations[:count])
+    extreme = np.abs(sequential.permutations) > abs(np.mean(test) -
+                                                     np.mean(control))
+    assert extreme.sum() == 10 and extreme[-1]
+    assert sequential.pvalue == 10 / count
+
+
+
+def test_repr_describes_permutations():
+    rng = np.random.default_rng(7)
+    small = TwoGroupsEffectSize(rng.normal(size=6), rng.normal(size=6),
+                                "mean_diff", resamples=1000)
+    assert small.permutation_exact
+    assert "all 924 distinct reshuffles" in repr(small)
+
+    control = rng.normal(size=30)
+    test    = rng.normal(size=30)
+    sequential = TwoGroupsEffectSize(control, test, "mean_diff",
+                                     resamples=1000,
+                                     permutation_stop_after=10)
+    assert sequential.permutation_stopped_early
+    assert "until 10 reshuffles were more extreme" in repr(sequential)
+    assert "took {} reshuffles".format(sequential.permutation_count) \
+           in repr(sequential)
+
+    drawn = TwoGroupsEffectSize(control, test, "mean_diff", resamples=1000,
+                                permutation_count=2000)
+    assert "2000 reshuffles of the control" in repr(drawn)
+
+
+
+@pytest.mark.parametrize("legacy_rng", [True, False])
+def test_permutations_not_stored(legacy_rng):
+    kwargs = dict(effect_size="mean_diff", is_paired=False,
+                  permutation_count=1000, legacy_rng=legacy_rng)
+    stored = PermutationTest(wellbeing.control, wellbeing.expt, **kwargs)
+    unstored = PermutationTest(wellbeing.control, wellbeing.expt,
+                               store_permutations=False, **kwargs)
+
+    assert isinstance(stored.permutations, np.ndarray)
+    assert stored.permutations.shape == (1000,)
+    assert unstored.permutations is None
+    assert unstored.pvalue == stored.pvalue
+    assert unstored.pvalue_mc_se == stored.pvalue_mc_se
+
+    # A sequential test keeps only the permutations it draws, however
+    # many it might have drawn. (The groups are too large to be enumerated.)
+    rng = np.random.default_rng(7)
+    control, test = rng.normal(size=30), rng.normal(size=30)
+    kwargs.update(permutation_count=10**9, stop_after=5)
+    sequential = PermutationTest(control, test, **kwargs)
+    unstored = PermutationTest(control, test, store_permutations=False,
+                               **kwargs)
+    assert sequential.stopped_early and unstored.stopped_early
+    assert len(sequential.permutations) == sequential.permutation_count
+    assert unstored.permutations is None
+    assert unstored.pvalue == sequential.pvalue
+
+    unstored_dabest = Dabest(wellbeing, idx=("control", "expt"),
+                             paired=False, id_col=None,
+                             store_permutations=False,
+                             **dabest_default_kwargs)
+    stored_dabest = Dabest(wellbeing, idx=("control", "expt"),
+                           paired=False, id_col=None,
+                           **dabest_default_kwargs)
+    assert unstored_dabest.mean_diff.store_permutations is False
+    assert unstored_dabest.mean_diff.results.pvalue_permutation[0] == \
+           stored_dabest.mean_diff.results.pvalue_permutation[0]
+    
+    
+    
 def test_lqrt_unpaired():
     unpaired_dabest = Dabest(wellbeing, idx=("control", "expt"), 
                              paired=False, id_col=None, 
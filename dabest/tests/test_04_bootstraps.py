@@ -0,0 +1,818 @@
+#!/usr/bin/python
+# -*-coding: utf-8 -*-
+# Author: Joses Ho
+# Email : joseshowh@gmail.com
+
+
+import warnings
+import pytest
+import numpy as np
+import pandas as pd
+from numpy.random import PCG64, RandomState
+from .._api import load
+from .._classes import TwoGroupsEffectSize
+from .._stats_tools import effsize
+from .._stats_tools import confint_2group_diff as ci2g
+
+
+
+# Data for tests.
+rng = RandomState(PCG64(12345))
+control = rng.normal(loc=3, scale=0.5, size=20)
+test    = rng.normal(loc=3.5, scale=0.75, size=25)
+paired_test = rng.normal(loc=3.5, scale=0.75, size=20)
+
+EFFECT_SIZES = ["mean_diff", "median_diff", "cohens_d", "hedges_g",
+                "cliffs_delta"]
+
+
+
+@pytest.mark.parametrize("effect_size", EFFECT_SIZES)
+def test_batch_matches_two_group_difference_unpaired(effect_size):
+    x0_idx, x1_idx = ci2g._create_two_group_bootstrap_indexes(
+                            RandomState(PCG64(12345)),
+                            len(control), len(test),
+                            is_paired=False, resamples=200)
+
+    batch = ci2g._batch_two_group_difference(control, test, x0_idx, x1_idx,
+                                             False, effect_size)
+    looped = [effsize.two_group_difference(control[i], test[j],
+                                           False, effect_size)
+              for i, j in zip(x0_idx, x1_idx)]
+
+    assert batch == pytest.approx(looped)
+
+
+
+@pytest.mark.parametrize("effect_size", EFFECT_SIZES[:-1])
+def test_batch_matches_two_group_difference_paired(effect_size):
+    x0_idx, x1_idx = ci2g._create_two_group_bootstrap_indexes(
+                            RandomState(PCG64(12345)),
+                            len(control), len(paired_test),
+                            is_paired=True, resamples=200)
+
+    batch = ci2g._batch_two_group_difference(control, paired_test,
+                                             x0_idx, x1_idx,
+                                             True, effect_size)
+    looped = [effsize.two_group_difference(control[i], paired_test[i],
+                                           True, effect_size)
+              for i in x0_idx]
+
+    assert batch == pytest.approx(looped)
+
+
+
+def test_bootstrap_indexes_follow_choice_stream():
+    legacy_rng = RandomState(PCG64(12345))
+    expected = [(legacy_rng.choice(len(control), len(control)),
+                 legacy_rng.choice(len(test), len(test)))
+                for i in range(50)]
+
+    x0_idx, x1_idx = ci2g._create_two_group_bootstrap_indexes(
+                            RandomState(PCG64(12345)),
+                            len(control), len(test),
+                            is_paired=False, resamples=50)
+
+    for (e0, e1), i0, i1 in zip(expected, x0_idx, x1_idx):
+        assert (e0 == i0).all()
+        assert (e1 == i1).all()
+
+
+
+def test_1group_bootstrap_indexes_drawn_lazily():
+    import types
+    from .._stats_tools.confint_1group import create_bootstrap_indexes
+
+    indexes = create_bootstrap_indexes(control, resamples=300)
+    assert isinstance(indexes, types.GeneratorType)
+
+    # The same indexes as drawing every resample at once.
+    expected = np.random.default_rng(12345).integers(0, len(control),
+                                                     size=(300, len(control)))
+    assert (np.array(list(indexes)) == expected).all()
+
+
+
+def test_1group_bootstraps_pass_positional_args_to_func():
+    from .._stats_tools.confint_1group import compute_1group_bootstraps
+
+    # Extra positional arguments go to `func`, not to `legacy_rng`.
+    boots = compute_1group_bootstraps(control, np.percentile, 20, 12345, 25)
+    expected = compute_1group_bootstraps(control, np.percentile, 20, 12345,
+                                         q=25)
+    assert boots == pytest.approx(expected)
+
+    legacy = compute_1group_bootstraps(control, np.percentile, 20, 12345, 25,
+                                       legacy_rng=True)
+    assert legacy != pytest.approx(boots)
+
+
+
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_bootstraps_independent_of_memory_limit(is_paired):
+    t = paired_test if is_paired else test
+    unchunked = ci2g.compute_bootstrapped_diff(control, t, is_paired,
+                                               "mean_diff", resamples=1000)
+
+    # Small enough to force blocks of a handful of resamples.
+    chunked = ci2g.compute_bootstrapped_diff(control, t, is_paired,
+                                             "mean_diff", resamples=1000,
+                                             memory_limit=10000)
+
+    assert chunked == pytest.approx(unchunked)
+
+
+
+@pytest.mark.parametrize("effect_size", ["mean_diff", "cohens_d", "hedges_g"])
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_resample_counts_match_resampled_values(effect_size, is_paired):
+    t = paired_test if is_paired else test
+    x0_idx, x1_idx = ci2g._create_two_group_bootstrap_indexes(
+                            RandomState(PCG64(12345)),
+                            len(control), len(t),
+                            is_paired=is_paired, resamples=200)
+
+    x0_counts = ci2g._count_rows(x0_idx, len(control))
+    x1_counts = ci2g._count_rows(x1_idx, len(t))
+    assert (x0_counts.sum(axis=1) == len(control)).all()
+
+    weighted = ci2g._batch_weighted_difference(control, t,
+                                               x0_counts, x1_counts,
+                                               is_paired, effect_size)
+    gathered = ci2g._batch_two_group_difference(control, t, x0_idx, x1_idx,
+                                                is_paired, effect_size)
+
+    assert weighted == pytest.approx(gathered)
+
+
+
+def test_resample_counts_constant_resample():
+    # Every resample of a constant group has zero variance, so Cohen's d
+    # is undefined rather than merely very large.
+    x0 = np.repeat(2.5, 5)
+    x1 = np.repeat(3.5, 5)
+    counts = ci2g._count_rows(np.zeros((3, 5), dtype=int), 5)
+    d = ci2g._batch_weighted_difference(x0, x1, counts, counts,
+                                        False, "cohens_d")
+
+    assert np.isinf(d).all()
+
+
+
+@pytest.mark.parametrize("effect_size", ["mean_diff", "cliffs_delta"])
+def test_parallel_bootstraps_independent_of_n_jobs(effect_size):
+    kwargs = dict(is_paired=False, effect_size=effect_size,
+                  resamples=1100, random_seed=12345)
+
+    serial = ci2g.compute_bootstrapped_diff(control, test, n_jobs=1, **kwargs)
+    parallel = ci2g.compute_bootstrapped_diff(control, test, n_jobs=3,
+                                              **kwargs)
+    chunked = ci2g.compute_bootstrapped_diff(control, test, n_jobs=2,
+                                             memory_limit=10000, **kwargs)
+
+    assert len(serial) == 1100
+    assert (serial == parallel).all()
+    assert (serial == chunked).all()
+
+
+
+def _report_memory_limit(x0, x1, seed_sequences, block_sizes, memory_limit):
+    return memory_limit
+
+
+
+def test_parallel_workers_share_memory_limit():
+    from numpy.random import SeedSequence
+
+    seed_sequences, block_sizes = ci2g._spawn_seed_sequences(
+                                        SeedSequence(12345), 1000)
+    limits = ci2g._map_seed_sequences(_report_memory_limit, control, test,
+                                      seed_sequences, block_sizes, 2,
+                                      memory_limit=10**6)
+    assert limits == [5 * 10**5, 5 * 10**5]
+
+    # Only as many workers as there are blocks are used.
+    assert ci2g._worker_memory_limit(10**6, 64, 4) == 25 * 10**4
+    assert ci2g._worker_memory_limit(None, 1, 4) == ci2g.DEFAULT_MEMORY_LIMIT
+
+
+
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_legacy_rng_matches_choice_loop(is_paired):
+    t = paired_test if is_paired else test
+    legacy_rng = RandomState(PCG64(12345))
+    expected = []
+    for i in range(300):
+        if is_paired:
+            idx = legacy_rng.choice(len(control), len(control))
+            expected.append(effsize.two_group_difference(control[idx], t[idx],
+                                                         True, "median_diff"))
+        else:
+            c = legacy_rng.choice(control, len(control))
+            tt = legacy_rng.choice(t, len(t))
+            expected.append(effsize.two_group_difference(c, tt, False,
+                                                         "median_diff"))
+
+    boots = ci2g.compute_bootstrapped_diff(control, t, is_paired,
+                                           "median_diff", resamples=300,
+                                           legacy_rng=True)
+
+    assert (boots == np.array(expected)).all()
+
+
+
+def test_legacy_rng_cannot_be_parallel():
+    with pytest.raises(ValueError):
+        ci2g.compute_bootstrapped_diff(control, test, False, "mean_diff",
+                                       n_jobs=2, legacy_rng=True)
+
+
+
+@pytest.mark.parametrize("legacy_rng", [False, True])
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_shared_resamples_match_single_effect_sizes(is_paired, legacy_rng):
+    t = paired_test if is_paired else test
+    effect_sizes = EFFECT_SIZES[:-1] if is_paired else EFFECT_SIZES
+
+    shared = ci2g.compute_bootstrapped_diff(control, t, is_paired,
+                                            effect_sizes, resamples=600,
+                                            memory_limit=10000,
+                                            legacy_rng=legacy_rng)
+    shared_jk = ci2g.compute_meandiff_jackknife(control, t, is_paired,
+                                                effect_sizes)
+
+    for es in effect_sizes:
+        single = ci2g.compute_bootstrapped_diff(control, t, is_paired, es,
+                                                resamples=600,
+                                                memory_limit=10000,
+                                                legacy_rng=legacy_rng)
+        assert (shared[es] == single).all()
+        assert (shared_jk[es] ==
+                ci2g.compute_meandiff_jackknife(control, t, is_paired, es)).all()
+
+
+
+def test_all_effect_sizes_match_single_effect_sizes():
+    df = pd.DataFrame({"Control": control[:20], "Test 1": test[:20],
+                       "Test 2": paired_test})
+    idx = ("Control", "Test 1", "Test 2")
+
+    reports = load(df, idx=idx, resamples=1000).all_effect_sizes(
+                                ["mean_diff", "hedges_g", "median_diff"])
+    assert list(reports.keys()) == ["mean_diff", "hedges_g", "median_diff"]
+
+    for es, report in reports.items():
+        expected = getattr(load(df, idx=idx, resamples=1000), es).results
+        pd.testing.assert_frame_equal(report.results, expected)
+
+
+
+def test_all_effect_sizes_skip_computed_results(monkeypatch):
+    df = pd.DataFrame({"Control": control[:20], "Test": test[:20]})
+    my_data = load(df, idx=("Control", "Test"), resamples=1000)
+    mean_diff_results = my_data.mean_diff.results
+
+    drawn = []
+    compute_bootstrapped_diff = ci2g.compute_bootstrapped_diff
+    def spy(x0, x1, is_paired, effect_size, *args, **kwargs):
+        drawn.append(list(effect_size))
+        return compute_bootstrapped_diff(x0, x1, is_paired, effect_size,
+                                         *args, **kwargs)
+    monkeypatch.setattr(ci2g, "compute_bootstrapped_diff", spy)
+
+    reports = my_data.all_effect_sizes(["mean_diff", "hedges_g"])
+    assert drawn == [["hedges_g"]]
+    assert reports["mean_diff"].results is mean_diff_results
+
+    my_data.all_effect_sizes(["mean_diff", "hedges_g"])
+    assert drawn == [["hedges_g"]]
+
+
+
+def test_all_effect_sizes_paired_excludes_cliffs_delta():
+    df = pd.DataFrame({"Control": control, "Test": paired_test,
+                       "ID": np.arange(len(control))})
+    my_data = load(df, idx=("Control", "Test"), paired=True, id_col="ID",
+                   resamples=500)
+
+    reports = my_data.all_effect_sizes()
+    assert "cliffs_delta" not in reports
+    assert reports["mean_diff"] is my_data.mean_diff
+
+    with pytest.raises(ValueError):
+        my_data.all_effect_sizes(["cliffs_delta"])
+
+
+
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_poisson_bootstraps_match_weighted_statistics(is_paired):
+    from numpy.random import SeedSequence, default_rng
+
+    t = paired_test if is_paired else test
+    x0_rng, x1_rng = [default_rng(s) for s in SeedSequence(12345).spawn(2)]
+    x0_weights = x0_rng.poisson(1.0, size=(len(control), 300)).T
+    if is_paired:
+        x1_weights = x0_weights
+    else:
+        x1_weights = x1_rng.poisson(1.0, size=(len(t), 300)).T
+
+    expected_mean_diff, expected_d = [], []
+    for w0, w1 in zip(x0_weights, x1_weights):
+        c = np.repeat(control, w0)
+        tt = np.repeat(t, w1)
+        expected_mean_diff.append(tt.mean() - c.mean())
+        expected_d.append(effsize.cohens_d(c, tt, is_paired))
+
+    boots = ci2g.compute_poisson_bootstrapped_diff(control, t, is_paired,
+                                                   ["mean_diff", "cohens_d"],
+                                                   resamples=300)
+
+    assert boots["mean_diff"] == pytest.approx(expected_mean_diff)
+    assert boots["cohens_d"] == pytest.approx(expected_d)
+
+
+
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_poisson_bootstraps_independent_of_chunks(is_paired):
+    t = paired_test if is_paired else test
+    whole = ci2g.compute_poisson_bootstrapped_diff(control, t, is_paired,
+                                                   "hedges_g", resamples=500)
+
+    # Chunks of different lengths, read one at a time.
+    x0_chunks = (c for c in np.array_split(control, 3))
+    x1_chunks = (c for c in np.array_split(t, 3 if is_paired else 4))
+    streamed = ci2g.compute_poisson_bootstrapped_diff(x0_chunks, x1_chunks,
+                                                      is_paired, "hedges_g",
+                                                      resamples=500)
+    # Chunks of a single observation.
+    chunked = ci2g.compute_poisson_bootstrapped_diff(control, t, is_paired,
+                                                     "hedges_g", resamples=500,
+                                                     memory_limit=1)
+
+    assert streamed == pytest.approx(whole)
+    assert chunked == pytest.approx(whole)
+
+
+
+def test_poisson_bootstraps_drop_paired_nans_together():
+    x0 = np.array([1, np.nan, 3, 4, 5, 6])
+    x1 = np.array([2, 4, np.nan, 6, 8, 9])
+    good = ~(np.isnan(x0) | np.isnan(x1))
+
+    with_nans = ci2g.compute_poisson_bootstrapped_diff(x0, x1, True,
+                                                       "mean_diff",
+                                                       resamples=2000)
+    dropped = ci2g.compute_poisson_bootstrapped_diff(x0[good], x1[good], True,
+                                                     "mean_diff",
+                                                     resamples=2000)
+
+    assert with_nans == pytest.approx(dropped, nan_ok=True)
+    assert np.nanmean(with_nans) == pytest.approx(2.25, abs=0.05)
+
+
+
+def test_poisson_bootstraps_reject_unequal_paired_groups():
+    x0 = np.arange(10.)
+    x1 = np.arange(5.)
+
+    # One chunk of each group is the same length, but x0 has a second.
+    with pytest.raises(ValueError):
+        ci2g.compute_poisson_bootstrapped_diff(x0, x1, True, "mean_diff",
+                                               resamples=100,
+                                               memory_limit=8000)
+    with pytest.raises(ValueError):
+        ci2g.compute_poisson_bootstrapped_diff([x0[:5], x0[5:]], [x1], True,
+                                               "mean_diff", resamples=100)
+    with pytest.raises(ValueError):
+        ci2g.compute_poisson_bootstrapped_diff([x1], [x0[:5], x0[5:]], True,
+                                               "mean_diff", resamples=100)
+
+
+
+def test_poisson_bootstraps_reject_other_effect_sizes():
+    with pytest.raises(ValueError):
+        ci2g.compute_poisson_bootstrapped_diff(control, test, False,
+                                               "median_diff")
+
+
+
+def test_bootstrap_dtype_keeps_float64_estimates():
+    df = pd.DataFrame({"Control": control, "Test": test[:20]})
+
+    full = load(df, idx=("Control", "Test"), resamples=1000).mean_diff.results
+    compact = load(df, idx=("Control", "Test"), resamples=1000,
+                   bootstrap_dtype=np.float32).mean_diff.results
+
+    assert compact.bootstraps[0].dtype == np.float32
+    assert (compact.bootstraps[0] == full.bootstraps[0].astype(np.float32)).all()
+    for col in ["difference", "bca_low", "bca_high", "pct_low", "pct_high"]:
+        assert compact[col][0] == full[col][0]
+
+    with pytest.raises(ValueError):
+        load(df, idx=("Control", "Test"), bootstrap_dtype=np.int32)
+
+    # Checked before any resampling, whether or not bootstraps are stored.
+    for store_bootstraps in [True, False]:
+        with pytest.raises(ValueError):
+            TwoGroupsEffectSize(control, test, "mean_diff",
+                                bootstrap_dtype=np.int32,
+                                store_bootstraps=store_bootstraps)
+
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 8])
+def test_batch_median_matches_numpy_median(n):
+    # Many tied values, so most resamples repeat the median value.
+    rng = RandomState(PCG64(12345))
+    x = rng.randint(0, 4, size=n).astype(float)
+    idx = rng.randint(0, n, size=(300, n))
+
+    assert (ci2g._batch_median(x, idx) == np.median(x[idx], axis=1)).all()
+
+
+
+@pytest.mark.parametrize("effect_size", ["mean_diff", "cohens_d", "hedges_g"])
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_closed_form_jackknife_matches_leave_one_out(effect_size, is_paired):
+    # Offset the data, so the closed form has to cope with large totals.
+    x0 = control + 1e4
+    x1 = (paired_test if is_paired else test) + 1e4
+
+    expected = [effsize.two_group_difference(x0[j0], x1[j1],
+                                             is_paired, effect_size)
+                for j0, j1 in ci2g._create_two_group_jackknife_indexes(
+                                                        x0, x1, is_paired)]
+    jackknife = ci2g.compute_meandiff_jackknife(x0, x1, is_paired,
+                                                effect_size)
+
+    assert jackknife == pytest.approx(expected, rel=1e-9)
+    assert ci2g._calc_accel(jackknife) == \
+           pytest.approx(ci2g._calc_accel(expected), rel=1e-6)
+
+
+
+@pytest.mark.parametrize("effect_size", ["cohens_d", "hedges_g"])
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_closed_form_jackknife_tied_data(effect_size, is_paired):
+    # Leaving out the first observation leaves no spread, which gives an
+    # infinite effect size rather than a large finite one.
+    x0 = np.array([1., 3., 3.])
+    x1 = np.array([5.1, 5.1, 5.1]) if not is_paired else \
+         np.array([2.1, 5.1, 5.1])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = [effsize.two_group_difference(x0[j0], x1[j1],
+                                                 is_paired, effect_size)
+                    for j0, j1 in ci2g._create_two_group_jackknife_indexes(
+                                                        x0, x1, is_paired)]
+    jackknife = ci2g.compute_meandiff_jackknife(x0, x1, is_paired,
+                                                effect_size)
+
+    assert np.isinf(jackknife[0])
+    assert jackknife == pytest.approx(expected, rel=1e-9, nan_ok=True)
+
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 8, 9])
+def test_jackknife_median_matches_leave_one_out(n):
+    from .._stats_tools.confint_1group import compute_1group_jackknife
+
+    # Tied values, so the observation left out may equal the middle ones.
+    x = RandomState(PCG64(12345)).randint(0, 4, size=n).astype(float)
+    expected = [np.median(np.delete(x, i)) if n > 1 else np.nan
+                for i in range(n)]
+
+    assert ci2g._jackknife_median(x) == pytest.approx(expected, nan_ok=True)
+    assert compute_1group_jackknife(x, np.median) == \
+           pytest.approx(expected, nan_ok=True)
+
+
+
+@pytest.mark.parametrize("is_paired", [False, True])
+def test_median_jackknife_matches_leave_one_out(is_paired):
+    t = paired_test if is_paired else test
+    expected = [effsize.two_group_difference(control[j0], t[j1],
+                                             is_paired, "median_diff")
+                for j0, j1 in ci2g._create_two_group_jackknife_indexes(
+                                                    control, t, is_paired)]
+
+    jackknife = ci2g.compute_meandiff_jackknife(control, t, is_paired,
+                                                "median_diff")
+
+    assert (jackknife == np.array(expected)).all()
+
+
+
+@pytest.mark.parametrize("rounded", [False, True])
+def test_cliffs_delta_jackknife_matches_leave_one_out(rounded):
+    # Rounding to ordinal scores makes many ties across the groups.
+    x0 = np.round(control) if rounded else control
+    x1 = np.round(test) if rounded else test
+    expected = [effsize.two_group_difference(x0[j0], x1[j1],
+                                             False, "cliffs_delta")
+                for j0, j1 in ci2g._create_two_group_jackknife_indexes(
+                                                        x0, x1, False)]
+
+    jackknife = ci2g.compute_meandiff_jackknife(x0, x1, False,
+                                                "cliffs_delta")
+
+    assert jackknife == pytest.approx(expected, abs=1e-12)
+
+
+
+def test_jackknife_indexes_are_created_lazily():
+    jackknives = ci2g._create_two_group_jackknife_indexes(control, test, False)
+    assert not isinstance(jackknives, list)
+
+    x0_idx, x1_idx = next(jackknives)
+    assert (x0_idx == np.arange(1, len(control))).all()
+    assert (x1_idx == np.arange(len(test))).all()
+
+    # The first min(n0, n1) observations of each group are left out.
+    assert sum(1 for j in jackknives) == 2 * len(control) - 1
+
+
+
+def test_partition_at_interval_limits_matches_sort():
+    boots = ci2g.compute_bootstrapped_diff(control, test, False, "mean_diff",
+                                           resamples=1000)
+    limits = [25, 974, np.nan, 0, 999]
+
+    partitioned = ci2g.partition_at_interval_limits(boots, limits)
+    for i in [25, 974, 0, 999]:
+        assert partitioned[i] == np.sort(boots)[i]
+
+
+
+@pytest.mark.parametrize("effect_size", ["mean_diff", "median_diff"])
+def test_unstored_bootstraps_give_the_same_intervals(effect_size):
+    df = pd.DataFrame({"Control": control, "Test": test[:20]})
+
+    stored = getattr(load(df, idx=("Control", "Test"), resamples=1000),
+                     effect_size)
+    unstored = getattr(load(df, idx=("Control", "Test"), resamples=1000,
+                            store_bootstraps=False), effect_size)
+
+    assert "bootstraps" not in unstored.results.columns
+    for col in ["bca_low", "bca_high", "pct_low", "pct_high"]:
+        assert unstored.results[col][0] == stored.results[col][0]
+
+    with pytest.raises(ValueError):
+        unstored.plot()
+
+
+
+def test_multiple_ci_levels_match_single():
+    df = pd.DataFrame({"control": control, "test": test[:20]})
+
+    levels = (80, 95, 99)
+    multi = load(df, idx=("control", "test"),
+                 ci=levels).mean_diff.results
+
+    assert len(multi) == len(levels)
+    assert multi.ci.tolist() == list(levels)
+
+    cols = ["bca_low", "bca_high", "pct_low", "pct_high"]
+    for i, level in enumerate(levels):
+        single = load(df, idx=("control", "test"),
+                      ci=level).mean_diff.results
+        for col in cols:
+            assert multi[col][i] == pytest.approx(single[col][0])
+
+
+
+def test_vectorized_interval_limits_match_scalar():
+    levels = [50, 80, 90, 95, 99]
+    for bias, accel in [(0.1, 0.02), (-0.3, -0.05), (0., 0.)]:
+        lows, highs = ci2g.compute_interval_limits(bias, accel, 5000, levels)
+        for low, high, level in zip(lows, highs, levels):
+            assert (low, high) == ci2g.compute_interval_limits(bias, accel,
+                                                               5000, level)
+
+
+
+@pytest.mark.parametrize("effect_size", EFFECT_SIZES)
+def test_studentized_bootstraps_match_plain_bootstraps(effect_size):
+    boots, ses, se = ci2g.compute_studentized_bootstraps(control, test, False,
+                                                         effect_size,
+                                                         resamples=500)
+    expected = ci2g.compute_bootstrapped_diff(control, test, False,
+                                              effect_size, resamples=500)
+
+    assert boots == pytest.approx(expected)
+    assert ses.shape == boots.shape
+    assert (ses > 0).all()
+    assert se > 0
+
+
+
+def test_studentized_mean_diff_se_is_welch_se():
+    boots, ses, se = ci2g.compute_studentized_bootstraps(control, test, False,
+                                                         "mean_diff",
+                                                         resamples=10)
+    welch_se = np.sqrt(np.var(control, ddof=1) / len(control) +
+                       np.var(test, ddof=1) / len(test))
+
+    assert se == pytest.approx(welch_se)
+
+
+
+def test_studentized_inner_bootstrap_does_not_depend_on_blocks():
+    kwargs = dict(x0=control, x1=paired_test, is_paired=True,
+                  effect_size="cohens_d", resamples=600)
+    boots, ses, se = ci2g.compute_studentized_bootstraps(**kwargs)
+    boots_, ses_, se_ = ci2g.compute_studentized_bootstraps(n_jobs=2,
+                                                    memory_limit=10**5,
+                                                    **kwargs)
+
+    assert (boots == boots_).all()
+    assert (ses == ses_).all()
+    assert se == se_
+
+
+
+def test_studentized_interval():
+    bca = TwoGroupsEffectSize(control, test, "mean_diff", resamples=1000,
+                              permutation_count=100)
+    assert np.isnan(bca.studentized_low) and np.isnan(bca.studentized_high)
+
+    result = TwoGroupsEffectSize(control, test, "mean_diff", ci=(90, 95),
+                                 resamples=1000, permutation_count=100,
+                                 ci_method="studentized")
+    assert result.ci_method == "studentized"
+    assert result.studentized_low[1] < result.studentized_low[0] \
+           < result.difference < result.studentized_high[0] \
+           < result.studentized_high[1]
+    # The BCa intervals are computed from the same bootstraps.
+    assert result.bca_low[1] == bca.bca_low
+
+    with pytest.raises(ValueError):
+        TwoGroupsEffectSize(control, test, "mean_diff", ci_method="bootstrap")
+    with pytest.raises(ValueError):
+        TwoGroupsEffectSize(control, test, "mean_diff", legacy_rng=True,
+                            ci_method="studentized")
+
+
+
+def test_studentized_interval_leaves_out_undefined_t_statistics():
+    boots = np.arange(100.)
+    ses = np.ones(100)
+    ses[[3, 50]] = 0.
+    ses[[7, 90]] = np.nan
+    good = np.isfinite(ses) & (ses > 0)
+
+    with pytest.warns(UserWarning, match="4 bootstrap"):
+        low, high = ci2g.compute_studentized_interval(boots, ses, 50., 1.)
+    assert (low, high) == ci2g.compute_studentized_interval(boots[good],
+                                                            ses[good], 50., 1.)
+
+    # Small samples of tied values, with resamples that have no spread.
+    x0 = np.array([5., 0., 3., 2., 3., 3., 1., 3.])
+    x1 = np.array([5., 4., 4., 2., 3., 3., 0., 3.])
+    for effect_size, is_paired in [("hedges_g", True),
+                                   ("median_diff", False),
+                                   ("cliffs_delta", False)]:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = TwoGroupsEffectSize(x0, x1, effect_size,
+                                         is_paired=is_paired, resamples=2000,
+                                         permutation_count=100,
+                                         ci_method="studentized")
+        assert np.isfinite([result.studentized_low,
+                            result.studentized_high]).all()
+        assert result.studentized_low < result.studentized_high
+
+
+
+def test_interval_limit_mc_se_matches_spread_over_seeds():
+    limits, mc_se = [], []
+    for seed in range(30):
+        boots = np.sort(ci2g.compute_bootstrapped_diff(control, test, False,
+                                                       "mean_diff",
+                                                       resamples=2000,
+                                                       random_seed=seed))
+        limits.append(boots[50])
+        mc_se.append(ci2g.compute_interval_limit_mc_se(boots, 50))
+
+    assert np.mean(mc_se) == pytest.approx(np.std(limits, ddof=1), rel=0.35)
+    assert np.isnan(ci2g.compute_interval_limit_mc_se(boots, np.nan))
+
+
+
+def test_adaptive_bootstraps_are_a_prefix_of_the_fixed_bootstraps():
+    difference = np.mean(test) - np.mean(control)
+    accel = ci2g._calc_accel(ci2g.compute_meandiff_jackknife(control, test,
+                                                    False, "mean_diff"))
+    kwargs = dict(x0=control, x1=test, is_paired=False,
+                  effect_size="mean_diff", effsize=difference,
+                  acceleration=accel, max_resamples=20000)
+
+    loose = ci2g.compute_adaptive_bootstrapped_diff(mc_tolerance=0.02,
+                                                    **kwargs)
+    tight = ci2g.compute_adaptive_bootstrapped_diff(mc_tolerance=0.005,
+                                                    **kwargs)
+    capped = ci2g.compute_adaptive_bootstrapped_diff(mc_tolerance=1e-9,
+                                                     **kwargs)
+
+    assert len(loose) < len(tight) < len(capped) == 20000
+    assert len(loose) % ci2g.ADAPTIVE_BATCH_RESAMPLES == 0
+    for boots in (loose, tight):
+        fixed = ci2g.compute_bootstrapped_diff(control, test, False,
+                                               "mean_diff",
+                                               resamples=len(boots))
+        assert (boots == fixed).all()
+
+
+
+def test_adaptive_resamples_are_reported():
+    df = pd.DataFrame({"Control": control, "Test": test[:20]})
+    results = load(df, idx=("Control", "Test"), resamples=20000,
+                   mc_tolerance=0.02).mean_diff.results
+
+    assert results.resamples[0] < 20000
+
+    with pytest.raises(ValueError):
+        TwoGroupsEffectSize(control, test, "mean_diff", legacy_rng=True,
+                            mc_tolerance=0.02)
+
+
+
+def test_mc_standard_errors_are_reported():
+    result = TwoGroupsEffectSize(control, test, "mean_diff", resamples=2000,
+                                 permutation_count=1000)
+    low_idx, high_idx = result.bca_interval_idx
+
+    assert result.bca_low_mc_se == \
+        ci2g.compute_interval_limit_mc_se(result.bootstraps, low_idx)
+    assert result.bca_high_mc_se == \
+        ci2g.compute_interval_limit_mc_se(result.bootstraps, high_idx)
+
+    p = result.pvalue_permutation
+    assert result.pvalue_permutation_mc_se == pytest.approx(
+                                                np.sqrt(p * (1 - p) / 1000))
+
+    unstored = TwoGroupsEffectSize(control, test, "mean_diff", resamples=2000,
+                                   permutation_count=1000,
+                                   store_bootstraps=False)
+    assert unstored.bca_low_mc_se == result.bca_low_mc_se
+    assert unstored.bca_high_mc_se == result.bca_high_mc_se
+
+
+
+def test_balanced_resamples_use_every_observation_equally():
+    g = np.random.default_rng(5)
+    x0_idx, x1_idx = ci2g._draw_balanced_bootstrap_indexes(g, g, 20, 25,
+                                                           False, 120)
+    assert x0_idx.shape == (120, 20) and x1_idx.shape == (120, 25)
+    assert (np.bincount(x0_idx.ravel()) == 120).all()
+    assert (np.bincount(x1_idx.ravel()) == 120).all()
+
+    # So the bootstrap mean of the mean difference has no Monte Carlo error.
+    boots = ci2g.compute_bootstrapped_diff(control, test, False, "mean_diff",
+                                           resamples=1100,
+                                           sampling="balanced")
+    assert boots.mean() == pytest.approx(test.mean() - control.mean())
+
+
+
+def test_balanced_resamples_refused_beyond_memory_limit():
+    # 250 resamples of 45 indexes take up 90000 bytes.
+    kwargs = dict(x0=control, x1=test, is_paired=False,
+                  effect_size="mean_diff", resamples=500, sampling="balanced")
+    ci2g.compute_bootstrapped_diff(memory_limit=180000, **kwargs)
+
+    with pytest.raises(ValueError):
+        ci2g.compute_bootstrapped_diff(memory_limit=179999, **kwargs)
+    with pytest.raises(ValueError):
+        ci2g.compute_adaptive_bootstrapped_diff(control, test, False,
+                                                "mean_diff", 0.5, 0., 0.1,
+                                                memory_limit=10**4,
+                                                sampling="balanced")
+
+
+
+def test_antithetic_resamples_are_mirrored():
+    g = np.random.default_rng(5)
+    x0_idx, x1_idx = ci2g._draw_antithetic_bootstrap_indexes(g, g, control,
+                                                             test, False, 11)
+    assert x0_idx.shape == (11, 20) and x1_idx.shape == (11, 25)
+
+    x0_ranks = np.argsort(np.argsort(control))
+    assert (x0_ranks[x0_idx[:5]] + x0_ranks[x0_idx[6:]] == 19).all()
+
+
+
+@pytest.mark.parametrize("sampling", ["balanced", "antithetic"])
+def test_variance_reduced_resamples_do_not_depend_on_blocks(sampling):
+    kwargs = dict(x0=control, x1=paired_test, is_paired=True,
+                  effect_size="mean_diff", resamples=1100, sampling=sampling)
+    boots = ci2g.compute_bootstrapped_diff(**kwargs)
+
+    assert (boots == ci2g.compute_bootstrapped_diff(n_jobs=2, **kwargs)).all()
+    # Small enough to evaluate each block of 250 resamples in pieces, but
+    # large enough to hold the indexes of a whole balanced block.
+    assert (boots == ci2g.compute_bootstrapped_diff(memory_limit=10**5,
+                                                    **kwargs)).all()
+
+    with pytest.raises(ValueError):
+        ci2g.compute_bootstrapped_diff(legacy_rng=True, **kwargs)
@@ -39,7 +39,7 @@ if __name__ == "__main__":
         long_description=LONG_DESCRIPTION,
         packages=find_packages(),
         install_requires=[
-            'numpy~=1.19',
+            'numpy~=1.20',
             'scipy~=1.5',
             'pandas~=1.1',
 